@@ -0,0 +1,447 @@
+"""Run an experiment and print its results as JSON.
+
+    python -m craps histogram_of_endings --strategy ThreePointMolly
+    python -m craps plot_strategies --strategy PassBet IronCross --out a.png
+
+Each command imports what it needs when it runs, so parsing arguments
+costs the same few milliseconds whichever experiment is chosen. NumPy is
+loaded when the first dice are rolled and matplotlib only by
+plot_strategies.
+"""
+import argparse
+import json
+import math
+import sys
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+STRATEGIES = ("PassBet", "PassComeBet", "ThreePointMolly", "PlaceNumbers",
+              "FieldBetOnly", "IronCross", "ColorUp")
+NUM_BINS = 10
+
+
+def _strategy(name: str) -> Callable:
+    from craps import strategy
+    return getattr(strategy, name)
+
+
+def _odds(text: str) -> Optional[int]:
+    """A --max-odds value, where "none" is the usual 3-4-5x."""
+    return None if text.lower() == "none" else int(text)
+
+
+def _takes_max_come_bets(name: str) -> bool:
+    import inspect
+    return "max_come_bets" in inspect.signature(_strategy(name)).parameters
+
+
+def _check_max_come_bets(parser: argparse.ArgumentParser,
+                         args: argparse.Namespace) -> None:
+    """Reject --max-come-bets here rather than in a worker process, for
+    strategies that have no such parameter."""
+    if getattr(args, "max_come_bets", None) is None:
+        return
+    names = getattr(args, "strategies", None) or [args.strategy]
+    unable = [name for name in names if not _takes_max_come_bets(name)]
+    if unable:
+        parser.error(f"--max-come-bets does not apply to "
+                     f"{', '.join(unable)}")
+
+
+def _factory(args: argparse.Namespace) -> Callable:
+    strategy = _strategy(args.strategy)
+    if args.max_come_bets is not None:
+        import functools
+        strategy = functools.partial(strategy,
+                                     max_come_bets=args.max_come_bets)
+    return strategy
+
+
+def _config(args: argparse.Namespace, max_iterations: Optional[int]):
+    from craps.runner import TrialConfig
+    return TrialConfig(_factory(args),
+                       args.min_bet,
+                       args.wallet,
+                       max_iterations,
+                       num_players=args.players,
+                       field_multiplier=args.field_multiplier,
+                       max_odds=args.max_odds)
+
+
+def _clean(value: Any) -> Any:
+    """`value` with tuples as lists and nan and inf as None, which strict
+    JSON parsers accept."""
+    if isinstance(value, float):
+        return value if math.isfinite(value) else None
+    if isinstance(value, dict):
+        return {k: _clean(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        if hasattr(value, "_asdict"):
+            return _clean(value._asdict())
+        return [_clean(v) for v in value]
+    return value
+
+
+def _summary(summary) -> Dict[str, Any]:
+    histogram = summary.histogram(NUM_BINS)
+    return {
+        "n": len(summary),
+        "mean": summary.stats.mean,
+        "stdev": summary.stats.stdev,
+        "min": summary.stats.min,
+        "max": summary.stats.max,
+        "p10": summary.quantile(0.1),
+        "p50": summary.quantile(0.5),
+        "p90": summary.quantile(0.9),
+        "interval": summary.stats.interval(),
+        "histogram": {
+            "edges": histogram.edges(),
+            "counts": histogram.counts
+        }
+    }
+
+
+def histogram_of_endings(args: argparse.Namespace) -> Dict[str, Any]:
+    from craps.runner import summarize_trials
+    summary = summarize_trials(_config(args, args.iterations), args.trials,
+                               args.seed, args.processes)
+    return {
+        "seed": summary.seed,
+        "num_trials": summary.num_trials,
+        "ruin": summary.ruined / summary.num_trials,
+        "end_wallet": _summary(summary.end_wallets)
+    }
+
+
+def how_long_to_live(args: argparse.Namespace) -> Dict[str, Any]:
+    from craps.runner import summarize_trials
+    summary = summarize_trials(_config(args, None), args.trials, args.seed,
+                               args.processes)
+    return {
+        "seed": summary.seed,
+        "num_trials": summary.num_trials,
+        "lifetime": _summary(summary.lifetimes)
+    }
+
+
+def histogram_of_endings_to_precision(
+        args: argparse.Namespace) -> Dict[str, Any]:
+    from craps.sequential import Target, END_WALLET, RUIN, run_until
+    result = run_until(_config(args, args.iterations),
+                       [Target(END_WALLET, args.width),
+                        Target(RUIN, args.ruin_width)],
+                       batch_size=args.batch_size,
+                       max_trials=args.max_trials,
+                       max_seconds=args.max_seconds,
+                       seed=args.seed,
+                       processes=args.processes)
+    return {
+        "seed": result.seed,
+        "num_trials": result.num_trials,
+        "num_batches": result.num_batches,
+        "seconds": result.seconds,
+        "converged": result.converged,
+        "intervals": result.intervals,
+        "end_wallet": _summary(result.summary.end_wallets)
+    }
+
+
+def how_long_to_live_exact(args: argparse.Namespace) -> Dict[str, Any]:
+    from craps.markov import solve
+    solution = solve(_factory(args)(), args.min_bet, args.wallet,
+                     field_multiplier=args.field_multiplier,
+                     horizon=args.horizon,
+                     max_odds=args.max_odds)
+    return {
+        "num_states": solution.num_states,
+        "expected_lifetime": solution.expected_lifetime,
+        "ruin_probability": solution.ruin_probability,
+        "escape_probability": solution.escape_probability,
+        "broke_within_horizon": math.fsum(solution.lifetime_pmf)
+    }
+
+
+def how_long_to_live_control(args: argparse.Namespace) -> Dict[str, Any]:
+    from craps.coin_control import coin_control_lifetimes
+    from craps.stats import Summary
+    summary = Summary()
+    summary.extend(
+        coin_control_lifetimes(args.wallet, args.min_bet, args.bias,
+                               args.trials, args.seed).tolist())
+    return {"num_trials": args.trials, "lifetime": _summary(summary)}
+
+
+def compare_strategies(args: argparse.Namespace) -> Dict[str, Any]:
+    from craps.compare import compare
+    args.strategy = args.strategies[0]
+    comparison = compare([_strategy(name) for name in args.strategies],
+                         args.trials,
+                         _config(args, args.iterations),
+                         seed=args.seed,
+                         antithetic=args.antithetic,
+                         processes=args.processes)
+    return {
+        "seed": comparison.seed,
+        "antithetic": comparison.antithetic,
+        "baseline": comparison.names[0],
+        "strategies": [{
+            "name": name,
+            "end_wallet": mean,
+            "difference": diff
+        } for name, mean, diff in comparison.summary()]
+    }
+
+
+def _cells(args: argparse.Namespace) -> List[Dict[str, Any]]:
+    from craps.sweep import grid
+    axes: Dict[str, Sequence[Any]] = {
+        "strategy": [_strategy(name) for name in args.strategies]
+    }
+    for name in ("min_bet", "wallet", "max_odds", "max_come_bets"):
+        values = getattr(args, name)
+        if values is not None:
+            axes[name] = values
+    return grid(**axes)
+
+
+def _base(args: argparse.Namespace):
+    from craps.runner import TrialConfig
+    return TrialConfig(_strategy(args.strategies[0]),
+                       max_iterations=args.iterations,
+                       num_players=args.players,
+                       field_multiplier=args.field_multiplier)
+
+
+def sweep(args: argparse.Namespace) -> Dict[str, Any]:
+    from craps import sweep as sweeps
+    table = sweeps.sweep(_cells(args),
+                         args.trials,
+                         args.seed if args.seed is not None else 0,
+                         _base(args),
+                         args.processes,
+                         args.checkpoint)
+    if args.csv is not None:
+        table.write_csv(args.csv)
+    return {"columns": table.columns, "rows": table.rows}
+
+
+def race(args: argparse.Namespace) -> Dict[str, Any]:
+    from craps.tournament import tournament
+    result = tournament(_cells(args),
+                        _base(args),
+                        initial_trials=args.initial_trials,
+                        eta=args.eta,
+                        max_trials=args.max_trials,
+                        keep=args.keep,
+                        metric=args.metric,
+                        seed=args.seed,
+                        processes=args.processes)
+    return {
+        "seed": result.seed,
+        "metric": result.metric,
+        "rounds": result.rounds,
+        "rolls": result.rolls,
+        "standings": [{
+            "name": s.name,
+            "interval": s.interval,
+            "trials": s.trials,
+            "rolls": s.rolls,
+            "eliminated": s.eliminated
+        } for s in result.standings]
+    }
+
+
+def plot_strategies(args: argparse.Namespace) -> Dict[str, Any]:
+    from craps.cache import cached_run_trials
+    from craps.plot import plot
+    histories: List[Any] = []
+    seed = args.seed
+    for name in args.strategies:
+        args.strategy = name
+        config = _config(args, args.iterations)._replace(trajectories=True)
+        results = cached_run_trials(config, args.trials, seed,
+                                    args.processes)
+        # Every strategy plays the same dice
+        seed = results.seed
+        histories.append(results.trajectories)
+    plot(histories,
+         path=args.out,
+         bands=args.bands,
+         labels=args.strategies)
+    return {"seed": seed, "path": args.out, "strategies": args.strategies}
+
+
+def _add_strategy(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument("--strategy",
+                        choices=STRATEGIES,
+                        default="ThreePointMolly")
+    parser.add_argument("--max-come-bets", type=int)
+
+
+def _add_strategies(parser: argparse.ArgumentParser,
+                    default: Sequence[str]) -> None:
+    parser.add_argument("--strategies",
+                        "--strategy",
+                        nargs="+",
+                        choices=STRATEGIES,
+                        default=list(default))
+
+
+def _add_rules(parser: argparse.ArgumentParser, wallet: int = 1000) -> None:
+    parser.add_argument("--min-bet", type=int, default=10)
+    parser.add_argument("--wallet", type=int, default=wallet)
+    parser.add_argument("--max-odds",
+                        type=_odds,
+                        help="odds multiple on every point, default 3-4-5x")
+
+
+def _add_table(parser: argparse.ArgumentParser,
+               iterations: Optional[int] = 100) -> None:
+    if iterations is not None:
+        parser.add_argument("--iterations", type=int, default=iterations)
+    parser.add_argument("--players", type=int, default=1)
+    parser.add_argument("--field-multiplier", type=int, default=3)
+
+
+def _add_run(parser: argparse.ArgumentParser,
+             trials: Optional[int]) -> None:
+    if trials is not None:
+        parser.add_argument("--trials", type=int, default=trials)
+    parser.add_argument("--seed", type=int)
+    parser.add_argument("--processes",
+                        type=int,
+                        help="worker processes, default one per CPU")
+
+
+def _add_grid(parser: argparse.ArgumentParser) -> None:
+    _add_strategies(parser, ["ThreePointMolly"])
+    parser.add_argument("--min-bet", type=int, nargs="+")
+    parser.add_argument("--wallet", type=int, nargs="+")
+    parser.add_argument("--max-odds", type=_odds, nargs="+")
+    parser.add_argument("--max-come-bets", type=int, nargs="+")
+    _add_table(parser, iterations=1000)
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog="python -m craps",
+        description="Craps simulations, printed as JSON.")
+    parser.add_argument("--indent",
+                        type=int,
+                        help="pretty print the JSON with this indent")
+    commands = parser.add_subparsers(dest="command", metavar="command")
+    commands.required = True
+
+    p = commands.add_parser("histogram_of_endings",
+                            help="end wallets after a number of rolls")
+    _add_strategy(p)
+    _add_rules(p, wallet=2000)
+    _add_table(p)
+    _add_run(p, 1000)
+    p.set_defaults(run=histogram_of_endings)
+
+    p = commands.add_parser("how_long_to_live",
+                            help="rolls until every player is broke")
+    _add_strategy(p)
+    _add_rules(p)
+    _add_table(p, iterations=None)
+    _add_run(p, 100)
+    p.set_defaults(run=how_long_to_live)
+
+    p = commands.add_parser(
+        "histogram_of_endings_to_precision",
+        help="end wallets, adding trials until the intervals are narrow")
+    _add_strategy(p)
+    _add_rules(p, wallet=2000)
+    _add_table(p)
+    _add_run(p, None)
+    p.add_argument("--width",
+                   type=float,
+                   default=5,
+                   help="widest end wallet interval")
+    p.add_argument("--ruin-width",
+                   type=float,
+                   default=0.005,
+                   help="widest ruin probability interval")
+    p.add_argument("--batch-size", type=int, default=100)
+    p.add_argument("--max-trials", type=int, default=100000)
+    p.add_argument("--max-seconds", type=float, default=600)
+    p.set_defaults(run=histogram_of_endings_to_precision)
+
+    p = commands.add_parser("how_long_to_live_exact",
+                            help="exact lifetime and ruin odds")
+    _add_strategy(p)
+    _add_rules(p)
+    p.add_argument("--field-multiplier", type=int, default=3)
+    p.add_argument("--horizon", type=int, default=1000)
+    p.set_defaults(run=how_long_to_live_exact)
+
+    p = commands.add_parser("how_long_to_live_control",
+                            help="flips until broke for a biased coin")
+    p.add_argument("--min-bet", type=int, default=10)
+    p.add_argument("--wallet", type=int, default=1000)
+    p.add_argument("--bias", type=float, default=0.9)
+    p.add_argument("--trials", type=int, default=10)
+    p.add_argument("--seed", type=int)
+    p.set_defaults(run=how_long_to_live_control)
+
+    p = commands.add_parser("compare_strategies",
+                            help="strategies on the same dice")
+    _add_strategies(
+        p, ["PassBet", "PassComeBet", "ThreePointMolly", "IronCross"])
+    _add_rules(p)
+    _add_table(p, iterations=1000)
+    p.add_argument("--antithetic", action="store_true")
+    _add_run(p, 200)
+    p.set_defaults(run=compare_strategies, max_come_bets=None)
+
+    p = commands.add_parser("sweep",
+                            help="every combination of table rules and "
+                            "strategy parameters")
+    _add_grid(p)
+    _add_run(p, 200)
+    p.add_argument("--checkpoint", help="JSON lines file to resume from")
+    p.add_argument("--csv", help="also write the table here")
+    p.set_defaults(run=sweep)
+
+    p = commands.add_parser("race",
+                            help="successive halving over strategy "
+                            "variants")
+    _add_grid(p)
+    p.add_argument("--initial-trials", type=int, default=100)
+    p.add_argument("--max-trials", type=int, default=10000)
+    p.add_argument("--eta", type=int, default=2)
+    p.add_argument("--keep", type=int, default=1)
+    p.add_argument("--metric",
+                   choices=("end_wallet", "lifetime"),
+                   default="end_wallet")
+    _add_run(p, None)
+    p.set_defaults(run=race)
+
+    p = commands.add_parser("plot_strategies",
+                            help="wallet trajectories of each strategy")
+    _add_strategies(p, ["IronCross"])
+    _add_rules(p)
+    _add_table(p, iterations=1000)
+    _add_run(p, 10)
+    p.add_argument("--out",
+                   help="write a .png or .svg here instead of showing a "
+                   "window")
+    p.add_argument("--bands",
+                   action="store_true",
+                   help="percentile bands instead of every trial")
+    p.set_defaults(run=plot_strategies, max_come_bets=None)
+    return parser
+
+
+def main(argv: Optional[Sequence[str]] = None, out=sys.stdout) -> int:
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    _check_max_come_bets(parser, args)
+    result = args.run(args)
+    json.dump(_clean(result), out, indent=args.indent, allow_nan=False)
+    out.write("\n")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,27 +1,125 @@
+from typing import Dict, List, Tuple
+from craps.constants import FIELD_IDS
+
+# Opcodes for Action.opcode and ActionBuffer entries
+BET = 0
+MOVE = 1
+NOTHING = 2
+# Interned Bets and Moves kept per class. Past this the table is emptied,
+# instances already handed out stay valid but are no longer shared.
+MAX_INTERNED = 4096
+
+
 class Action():
-    pass
+    __slots__ = ()
+    opcode = NOTHING
 
 
 class Bet(Action):
+    """Bets are interned, `Bet(name, amount)` returns a shared instance."""
+    __slots__ = ("field_name", "amount", "field_id")
+    opcode = BET
+    _interned: Dict[Tuple[str, int], "Bet"] = {}
+    field_name: str
+    amount: int
+    field_id: int
+
+    def __new__(cls, field_name: str, amount: int):
+        bet = cls._interned.get((field_name, amount))
+        if bet is None:
+            bet = super().__new__(cls)
+            bet.field_name = field_name
+            bet.amount = amount
+            bet.field_id = FIELD_IDS[field_name]
+            if len(cls._interned) >= MAX_INTERNED:
+                cls._interned.clear()
+            cls._interned[(field_name, amount)] = bet
+        return bet
+
     def __init__(self, field_name: str, amount: int):
-        self.field_name = field_name
-        self.amount = amount
+        pass
+
+    def __reduce__(self):
+        return (Bet, (self.field_name, self.amount))
 
     def __str__(self) -> str:
         return f"Betting {self.amount} on {self.field_name}"
 
 
 class Move(Action):
+    """Moves are interned like Bets."""
+    __slots__ = ("from_field_name", "to_field_name", "from_id", "to_id")
+    opcode = MOVE
+    _interned: Dict[Tuple[str, str], "Move"] = {}
+    from_field_name: str
+    to_field_name: str
+    from_id: int
+    to_id: int
+
+    def __new__(cls, from_field_name: str, to_field_name):
+        move = cls._interned.get((from_field_name, to_field_name))
+        if move is None:
+            move = super().__new__(cls)
+            move.from_field_name = from_field_name
+            move.to_field_name = to_field_name
+            move.from_id = FIELD_IDS[from_field_name]
+            move.to_id = FIELD_IDS[to_field_name]
+            if len(cls._interned) >= MAX_INTERNED:
+                cls._interned.clear()
+            cls._interned[(from_field_name, to_field_name)] = move
+        return move
+
     def __init__(self, from_field_name: str, to_field_name):
-        self.from_field_name = from_field_name
-        self.to_field_name = to_field_name
+        pass
+
+    def __reduce__(self):
+        return (Move, (self.from_field_name, self.to_field_name))
 
     def __str__(self) -> str:
         return f"Moving from {self.from_field_name} to {self.to_field_name}"
 
 
 class DoNothing(Action):
-    pass
+    """A singleton, `DoNothing()` always returns DO_NOTHING."""
+    __slots__ = ()
+    _instance = None
+
+    def __new__(cls):
+        if cls._instance is None:
+            cls._instance = super().__new__(cls)
+        return cls._instance
+
+    def __reduce__(self):
+        return (DoNothing, ())
 
     def __str__(self) -> str:
-        return f"Doing nothing"
+        return "Doing nothing"
+
+
+DO_NOTHING = DoNothing()
+
+
+class ActionBuffer():
+    """Flat (opcode, field id, amount or target field id) triples.
+
+    Strategies with `buffered = True` append to the table's buffer in
+    `write_actions` instead of returning Action objects, and the table
+    applies the whole buffer in one pass.
+    """
+    __slots__ = ("ops", )
+
+    def __init__(self) -> None:
+        self.ops: List[int] = []
+
+    def clear(self) -> None:
+        del self.ops[:]
+
+    def bet(self, field_id: int, amount: int) -> None:
+        self.ops.append(BET)
+        self.ops.append(field_id)
+        self.ops.append(amount)
+
+    def move(self, from_id: int, to_id: int) -> None:
+        self.ops.append(MOVE)
+        self.ops.append(from_id)
+        self.ops.append(to_id)
@@ -0,0 +1,97 @@
+from typing import List, Sequence, Set, Tuple
+
+
+class Bankroll():
+    """Running aggregates of the players' wallets.
+
+    The table updates these as bets are placed and paid, so the total and
+    the per-player extremes never need re-summing. Wallets are cash in
+    hand: money out on a bet counts against the trough and drawdown until
+    it is paid back.
+    """
+
+    def __init__(self) -> None:
+        self.clear()
+
+    def clear(self) -> None:
+        self.total: float = 0
+        self.start_total: float = 0
+        self.peak_total: float = 0
+        self.trough_total: float = 0
+        self.max_drawdown_total: float = 0
+        # By seat
+        self.start: List[float] = []
+        self.peak: List[float] = []
+        self.trough: List[float] = []
+        self.max_drawdown: List[float] = []
+        # Seats with nothing left in their wallet
+        self.broke: Set[int] = set()
+        # Set by the table once a roll settles with no money left in any
+        # wallet, even if bets still on the table later pay some back
+        self.ruined = False
+
+    def join(self, seat: int, wallet: float) -> None:
+        self.start.append(wallet)
+        self.peak.append(wallet)
+        self.trough.append(wallet)
+        self.max_drawdown.append(0)
+        if wallet <= 0:
+            self.broke.add(seat)
+        self.total += wallet
+        self.start_total += wallet
+        # Seating a player starts the table's extremes over
+        self.peak_total = self.trough_total = self.total
+
+    def withdraw(self, seat: int, wallet: float, amount: float) -> None:
+        """`amount` left the wallet of `seat`, leaving `wallet`."""
+        if wallet < self.trough[seat]:
+            self.trough[seat] = wallet
+        if self.peak[seat] - wallet > self.max_drawdown[seat]:
+            self.max_drawdown[seat] = self.peak[seat] - wallet
+        if wallet <= 0:
+            self.broke.add(seat)
+        total = self.total - amount
+        self.total = total
+        if total < self.trough_total:
+            self.trough_total = total
+        if self.peak_total - total > self.max_drawdown_total:
+            self.max_drawdown_total = self.peak_total - total
+
+    def deposit(self, seat: int, wallet: float, amount: float) -> None:
+        """`amount` was paid to `seat`, leaving `wallet`."""
+        if wallet > self.peak[seat]:
+            self.peak[seat] = wallet
+        if wallet > 0 and self.broke:
+            self.broke.discard(seat)
+        total = self.total + amount
+        self.total = total
+        if total > self.peak_total:
+            self.peak_total = total
+
+    def drawdown(self, seat: int, wallet: float) -> float:
+        return self.peak[seat] - wallet
+
+    def drawdown_total(self) -> float:
+        return self.peak_total - self.total
+
+    def reset(self, wallets: Sequence[float]) -> None:
+        """Start over from `wallets`, one per seat."""
+        self.clear()
+        for seat, wallet in enumerate(wallets):
+            self.join(seat, wallet)
+
+    def snapshot(self) -> Tuple:
+        return (self.total, self.start_total, self.peak_total,
+                self.trough_total, self.max_drawdown_total, list(self.start),
+                list(self.peak), list(self.trough), list(self.max_drawdown),
+                set(self.broke), self.ruined)
+
+    def restore(self, state: Tuple) -> None:
+        (self.total, self.start_total, self.peak_total, self.trough_total,
+         self.max_drawdown_total, start, peak, trough, max_drawdown,
+         broke, self.ruined) = state
+        self.start = list(start)
+        self.peak = list(peak)
+        self.trough = list(trough)
+        self.max_drawdown = list(max_drawdown)
+        self.broke = set(broke)
@@ -0,0 +1,340 @@
+from typing import (Any, Dict, NamedTuple, Optional, Sequence, Tuple, Type,
+                    Union)
+import numpy  # type: ignore
+from craps import strategy
+from craps.declarative import CompiledStrategy
+from craps.constants import FIELD_IDS, NUM_FIELDS, NUM_TO_FIELD, POINT_NUMS
+from craps.game import MAX_ODDS, place_bet_amount
+from craps.rules import WIN, LOSE, MOVE, RuleTable, default_rules
+
+PASS_LINE = FIELD_IDS["PASS_LINE"]
+PASS_ODDS = FIELD_IDS["PASS_ODDS"]
+COME = FIELD_IDS["COME"]
+FIELD = FIELD_IDS["FIELD"]
+COME_IDS = [FIELD_IDS[f"{NUM_TO_FIELD[n]}_COME"] for n in POINT_NUMS]
+PLACE_IDS = {n: FIELD_IDS[f"{NUM_TO_FIELD[n]}_PLACE"] for n in POINT_NUMS}
+
+# Rows of the compiled rule arrays are indexed by point * 13 + dice
+NUM_KEYS = 11 * 13
+
+
+class RuleArrays(NamedTuple):
+    # Fraction of each bet returned to the wallet, bet + win, or 0
+    returned: Any
+    # 1 for bets left on the table, 0 for settled bets
+    kept: Any
+    # Field id every COME bet moves to, -1 for none
+    move_to: Any
+    next_point: Any
+
+
+def compile_rule_arrays(rules: RuleTable) -> RuleArrays:
+    """Flatten a rule table into per-(point, dice) arrays.
+
+    Only the first settlement on a field can touch money, later ones find
+    it empty, and moves must come after every win or loss.
+    """
+    returned = numpy.zeros((NUM_KEYS, NUM_FIELDS))
+    kept = numpy.ones((NUM_KEYS, NUM_FIELDS))
+    move_to = numpy.full(NUM_KEYS, -1, dtype=numpy.int64)
+    next_point = numpy.zeros(NUM_KEYS, dtype=numpy.int8)
+    for point, row in enumerate(rules):
+        for dice, transition in enumerate(row):
+            if transition is None:
+                continue
+            key = point * 13 + dice
+            settled = set()
+            for op, field_id, arg in transition.settlements:
+                if op == MOVE:
+                    assert field_id == COME, "Only COME bets can move"
+                    assert move_to[key] == -1, "One move per roll"
+                    move_to[key] = int(arg)
+                    continue
+                assert move_to[key] == -1, "Moves must settle last"
+                if field_id in settled:
+                    continue
+                settled.add(field_id)
+                kept[key, field_id] = 0
+                if op == WIN:
+                    returned[key, field_id] = 1 + arg
+                elif op != LOSE:
+                    raise ValueError(f"Unknown settlement {op}")
+            next_point[key] = transition.point or 0
+    return RuleArrays(returned, kept, move_to, next_point)
+
+
+class BatchStrategy():
+    """Vectorized counterpart of a `craps.strategy.Strategy`.
+
+    `bets` returns an (n, NUM_FIELDS) array of amounts each table adds
+    before the roll, for the tables selected by `idx`.
+    """
+
+    def bets(self, game: "BatchCraps", idx: Any) -> Any:
+        raise NotImplementedError()
+
+    def _empty(self, game: "BatchCraps", idx: Any, field_id: int) -> Any:
+        return game.amounts[idx, field_id] == 0
+
+    def _pass_line(self, game: "BatchCraps", idx: Any, bets: Any) -> Any:
+        coming_out = game.point[idx] == 0
+        bet_pass = coming_out & self._empty(game, idx, PASS_LINE)
+        bets[bet_pass, PASS_LINE] = game.min_bet
+        return coming_out, bet_pass
+
+
+class BatchPassBet(BatchStrategy):
+    def bets(self, game: "BatchCraps", idx: Any) -> Any:
+        bets = numpy.zeros((len(idx), NUM_FIELDS))
+        self._pass_line(game, idx, bets)
+        return bets
+
+
+class BatchPassComeBet(BatchStrategy):
+    def __init__(self, max_come_bets: int = 2) -> None:
+        self.max_come_bets = max_come_bets
+
+    def _come(self, game: "BatchCraps", idx: Any, bets: Any) -> None:
+        on = game.point[idx] != 0
+        num_come = (game.amounts[numpy.ix_(idx, COME_IDS)] > 0).sum(axis=1)
+        bet_come = (on & self._empty(game, idx, COME) &
+                    (num_come < self.max_come_bets))
+        bets[bet_come, COME] = game.min_bet
+
+    def bets(self, game: "BatchCraps", idx: Any) -> Any:
+        bets = numpy.zeros((len(idx), NUM_FIELDS))
+        self._pass_line(game, idx, bets)
+        self._come(game, idx, bets)
+        return bets
+
+
+class BatchThreePointMolly(BatchPassComeBet):
+    def bets(self, game: "BatchCraps", idx: Any) -> Any:
+        bets = numpy.zeros((len(idx), NUM_FIELDS))
+        self._pass_line(game, idx, bets)
+        # The scalar strategy only adds come odds to odds bets that are
+        # already up, so it never places any.
+        point = game.point[idx]
+        bet_odds = (point != 0) & self._empty(game, idx, PASS_ODDS)
+        bets[bet_odds, PASS_ODDS] = (game.min_bet *
+                                     game.max_odds[point[bet_odds]])
+        self._come(game, idx, bets)
+        return bets
+
+
+class BatchPlaceNumbers(BatchStrategy):
+    def bets(self, game: "BatchCraps", idx: Any) -> Any:
+        bets = numpy.zeros((len(idx), NUM_FIELDS))
+        self._pass_line(game, idx, bets)
+        point = game.point[idx]
+        on = point != 0
+        for num, field_id in PLACE_IDS.items():
+            bet = on & self._empty(game, idx, field_id) & (point != num)
+            bets[bet, field_id] = game.place_amounts[field_id]
+        bets[on & self._empty(game, idx, FIELD), FIELD] = game.min_bet
+        return bets
+
+
+class BatchFieldBetOnly(BatchStrategy):
+    def bets(self, game: "BatchCraps", idx: Any) -> Any:
+        bets = numpy.zeros((len(idx), NUM_FIELDS))
+        bets[self._empty(game, idx, FIELD), FIELD] = game.min_bet
+        return bets
+
+
+class BatchIronCross(BatchStrategy):
+    def bets(self, game: "BatchCraps", idx: Any) -> Any:
+        bets = numpy.zeros((len(idx), NUM_FIELDS))
+        field_empty = self._empty(game, idx, FIELD)
+        _, bet_pass = self._pass_line(game, idx, bets)
+        point = game.point[idx]
+        on = point != 0
+        for num in (6, 8):
+            field_id = PLACE_IDS[num]
+            bet = on & self._empty(game, idx, field_id) & (point != num)
+            bets[bet, field_id] = game.place_amounts[field_id]
+        bets[(bet_pass | on) & field_empty, FIELD] = game.min_bet
+        return bets
+
+
+class BatchCompiledStrategy(BatchStrategy):
+    """Runs a `CompiledStrategy` decision table on arrays of tables."""
+
+    def __init__(self, compiled: CompiledStrategy) -> None:
+        self.compiled = compiled
+        self.field_ids = [FIELD_IDS[name] for name in compiled.fields]
+        self.num_flags = len(compiled.flag_names)
+        self.thresholds = numpy.array(compiled.thresholds)
+        self.num_buckets = len(compiled.thresholds) + 1
+        self.flags: Optional[Any] = None
+        self._min_bet: Optional[int] = None
+
+    def _index(self, point: int, mask: int, flag_values: Tuple[bool, ...],
+               bucket: int) -> int:
+        # Same bit layout as the vectorized key in `bets`
+        index = point
+        for field_id in self.field_ids:
+            index = (index << 1) | bool(mask & (1 << field_id))
+        for value in flag_values:
+            index = (index << 1) | value
+        return index * self.num_buckets + bucket
+
+    def _bind(self, min_bet: int) -> None:
+        size = self._index(11, 0, (False, ) * self.num_flags, 0)
+        self.table = numpy.zeros((size, NUM_FIELDS))
+        self.flag_set = numpy.zeros((size, self.num_flags), dtype=bool)
+        self.flag_value = numpy.zeros((size, self.num_flags), dtype=bool)
+        for key, decision in self.compiled.table.items():
+            index = self._index(*key)
+            for name, units in decision.bets:
+                self.table[index, FIELD_IDS[name]] += self.compiled.amount(
+                    name, units, min_bet)
+            for name, value in decision.set_flags:
+                j = self.compiled.flag_names.index(name)
+                self.flag_set[index, j] = True
+                self.flag_value[index, j] = value
+        self._min_bet = min_bet
+
+    def bets(self, game: "BatchCraps", idx: Any) -> Any:
+        if self._min_bet != game.min_bet:
+            self._bind(game.min_bet)
+        if self.flags is None or len(self.flags) != game.n:
+            initial = [
+                self.compiled.initial_flags.get(name, False)
+                for name in self.compiled.flag_names
+            ]
+            self.flags = numpy.tile(numpy.array(initial, dtype=bool),
+                                    (game.n, 1))
+        index = game.point[idx].astype(numpy.int64)
+        for field_id in self.field_ids:
+            index = (index << 1) | (game.amounts[idx, field_id] > 0)
+        flags = self.flags[idx]
+        for j in range(self.num_flags):
+            index = (index << 1) | flags[:, j]
+        index = index * self.num_buckets + numpy.searchsorted(
+            self.thresholds, game.wallet[idx] / game.min_bet, side="right")
+        flag_set = self.flag_set[index]
+        self.flags[idx] = numpy.where(flag_set, self.flag_value[index],
+                                      flags)
+        return self.table[index]
+
+
+BATCH_STRATEGIES: Dict[Type[strategy.Strategy], Type[BatchStrategy]] = {
+    strategy.PassBet: BatchPassBet,
+    strategy.PassComeBet: BatchPassComeBet,
+    strategy.ThreePointMolly: BatchThreePointMolly,
+    strategy.PlaceNumbers: BatchPlaceNumbers,
+    strategy.FieldBetOnly: BatchFieldBetOnly,
+    strategy.IronCross: BatchIronCross,
+}
+
+
+def batch_strategy(
+        strategy_cls: Union[Type[strategy.Strategy], CompiledStrategy]
+) -> BatchStrategy:
+    if isinstance(strategy_cls, CompiledStrategy):
+        return BatchCompiledStrategy(strategy_cls)
+    if strategy_cls not in BATCH_STRATEGIES:
+        raise ValueError(f"No vectorized version of {strategy_cls.__name__}")
+    return BATCH_STRATEGIES[strategy_cls]()
+
+
+class BatchCraps():
+    """N independent single-player tables played in lockstep.
+
+    Phase and point, every bet slot and every wallet are NumPy arrays, one
+    row per table. Each step draws one roll per table and settles all of
+    them with masked array operations using the same compiled rules as
+    `Craps`.
+    """
+
+    def __init__(self,
+                 num_tables: int,
+                 min_bet: int,
+                 wallet: float,
+                 strategy: BatchStrategy,
+                 field_multiplier: int = 3,
+                 rules: Optional[RuleTable] = None,
+                 seed: Any = None,
+                 spawn_key: Sequence[int] = (),
+                 chunk_size: int = 64,
+                 max_odds: Optional[int] = None) -> None:
+        self.n = num_tables
+        self.min_bet = min_bet
+        self.strategy = strategy
+        self.rules = compile_rule_arrays(rules if rules is not None else
+                                         default_rules(field_multiplier))
+        seed_seq = numpy.random.SeedSequence(seed, spawn_key=tuple(spawn_key))
+        self.gen = numpy.random.Generator(numpy.random.PCG64(seed_seq))
+        self.chunk_size = chunk_size
+        self._dice = numpy.zeros((0, num_tables), dtype=numpy.int8)
+
+        # 0 while coming out, else the point
+        self.point = numpy.zeros(num_tables, dtype=numpy.int8)
+        self.amounts = numpy.zeros((num_tables, NUM_FIELDS))
+        self.wallet = numpy.full(num_tables, float(wallet))
+        self.iteration = 0
+        self.lifetime = numpy.zeros(num_tables, dtype=numpy.int64)
+        self.active = numpy.ones(num_tables, dtype=bool)
+
+        self.max_odds = numpy.zeros(11, dtype=numpy.int64)
+        for num in POINT_NUMS:
+            self.max_odds[num] = (MAX_ODDS[f"{NUM_TO_FIELD[num]}_ODDS"]
+                                  if max_odds is None else max_odds)
+        self.place_amounts = {
+            field_id: place_bet_amount(min_bet, f"{NUM_TO_FIELD[num]}_PLACE")
+            for num, field_id in PLACE_IDS.items()
+        }
+
+    def roll(self) -> Any:
+        if self.iteration % self.chunk_size == 0:
+            shape = (self.chunk_size, self.n)
+            self._dice = (self.gen.integers(1, 7, shape, dtype=numpy.int8) +
+                          self.gen.integers(1, 7, shape, dtype=numpy.int8))
+        return self._dice[self.iteration % self.chunk_size]
+
+    def step(self, idx: Any) -> Any:
+        bets = self.strategy.bets(self, idx)
+        self.wallet[idx] -= bets.sum(axis=1)
+        amounts = self.amounts[idx] + bets
+
+        dice = self.roll()[idx]
+        key = self.point[idx].astype(numpy.int64) * 13 + dice
+        rules = self.rules
+        self.wallet[idx] += (amounts * rules.returned[key]).sum(axis=1)
+        amounts *= rules.kept[key]
+        move_to = rules.move_to[key]
+        moving = numpy.flatnonzero(move_to >= 0)
+        amounts[moving, move_to[moving]] += amounts[moving, COME]
+        amounts[moving, COME] = 0
+        self.amounts[idx] = amounts
+        self.point[idx] = rules.next_point[key]
+        return dice
+
+    def start(self, max_iterations: Optional[int],
+              trajectories: bool = False) -> Optional[Any]:
+        """Play every table, like `Craps.start` for each of them.
+
+        With `max_iterations=None` a table stops one roll after its wallet
+        reaches zero, and `lifetime` holds the number of rolls it played.
+        Returns an (iterations, n) array of wallets when `trajectories` is
+        set.
+        """
+        everyone = numpy.arange(self.n)
+        history = []
+        while self.active.any():
+            if max_iterations is None:
+                idx = numpy.flatnonzero(self.active)
+                last = self.wallet[idx] <= 0
+            else:
+                idx = everyone
+                last = numpy.full(self.n, self.iteration >= max_iterations)
+            self.step(idx)
+            self.iteration += 1
+            self.lifetime[idx] += 1
+            self.active[idx[last]] = False
+            if trajectories:
+                history.append(self.wallet.copy())
+        if trajectories:
+            return numpy.array(history)
+        return None
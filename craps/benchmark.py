@@ -0,0 +1,234 @@
+import argparse
+import gc
+import json
+import platform
+import sys
+import time
+import tracemalloc
+from typing import Callable, Dict, List, NamedTuple, Optional, Sequence
+from craps.game import Craps
+from craps.history import NoHistory, Recorder
+from craps.player import Player
+from craps.runner import TrialConfig, run_trials
+from craps.strategy import (Strategy, PassBet, PassComeBet, ThreePointMolly,
+                            PlaceNumbers, FieldBetOnly, IronCross, ColorUp)
+
+BASELINE_VERSION = 1
+SEED = 2020
+
+STRATEGIES: Sequence[Callable[[], Strategy]] = (
+    PassBet,
+    PassComeBet,
+    ThreePointMolly,
+    PlaceNumbers,
+    FieldBetOnly,
+    IronCross,
+    ColorUp,
+)
+PLAYER_COUNTS = (1, 8, 64)
+
+
+class Measurement(NamedTuple):
+    rolls: int
+    seconds: float
+    rolls_per_sec: float
+    # Peak traced allocation while playing, divided by the rolls played
+    bytes_per_roll: float
+
+
+class Regression(NamedTuple):
+    name: str
+    metric: str
+    baseline: float
+    current: float
+    # Relative change, positive is worse
+    change: float
+
+
+class Case(NamedTuple):
+    name: str
+    # Plays the workload and returns the number of table rolls
+    run: Callable[[], int]
+
+
+def _table(strategy: Callable[[], Strategy], num_players: int,
+           history: bool) -> Craps:
+    game = Craps(10,
+                 seed=SEED,
+                 history=Recorder() if history else NoHistory())
+    for i in range(num_players):
+        game.join(Player(name=f"Player {i + 1}", wallet=1000000,
+                         strategy=strategy()))
+    return game
+
+
+def table_case(strategy: Callable[[], Strategy], num_players: int,
+               history: bool, iterations: int) -> Case:
+    name = (f"{strategy.__name__}/{num_players}p/"
+            f"{'history' if history else 'no-history'}")
+
+    def run() -> int:
+        game = _table(strategy, num_players, history)
+        game.start(max_iterations=iterations)
+        return game.iteration
+
+    return Case(name, run)
+
+
+def trials_case(name: str, config: TrialConfig, num_trials: int) -> Case:
+    def run() -> int:
+        results = run_trials(config, num_trials, seed=SEED, processes=1)
+        return sum(results.lifetimes)
+
+    return Case(name, run)
+
+
+def default_cases(quick: bool = False) -> List[Case]:
+    """Every strategy at 1/8/64 players with history on and off, and the
+    `index.py` workloads on a single process."""
+    scale = 10 if quick else 1
+    cases = []
+    for strategy in STRATEGIES:
+        for num_players in PLAYER_COUNTS:
+            iterations = max(100, 40000 // num_players // scale)
+            for history in (True, False):
+                cases.append(
+                    table_case(strategy, num_players, history, iterations))
+    cases.append(
+        trials_case("histogram_of_endings",
+                    TrialConfig(ThreePointMolly, 10, 2000, 100),
+                    1000 // scale))
+    cases.append(
+        trials_case("how_long_to_live",
+                    TrialConfig(ThreePointMolly, 10, 1000, None),
+                    100 // scale))
+    return cases
+
+
+def measure(case: Case, repeat: int = 3) -> Measurement:
+    """Best of `repeat` timed runs after a warm-up, then one traced run for
+    memory."""
+    case.run()
+    best = float("inf")
+    rolls = 0
+    for _ in range(repeat):
+        gc.collect()
+        start = time.perf_counter()
+        rolls = case.run()
+        best = min(best, time.perf_counter() - start)
+
+    gc.collect()
+    tracemalloc.start()
+    try:
+        case.run()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return Measurement(rolls, best, rolls / best, peak / rolls)
+
+
+def run(cases: Sequence[Case],
+        repeat: int = 3,
+        out=sys.stdout) -> Dict[str, Measurement]:
+    results: Dict[str, Measurement] = {}
+    for case in cases:
+        results[case.name] = m = measure(case, repeat)
+        if out is not None:
+            print(f"{case.name:<36} {m.rolls_per_sec:>12,.0f} rolls/s "
+                  f"{m.bytes_per_roll:>10,.1f} B/roll",
+                  file=out)
+    return results
+
+
+def save_baseline(path: str, results: Dict[str, Measurement]) -> None:
+    data = {
+        "version": BASELINE_VERSION,
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "results": {name: m._asdict()
+                    for name, m in results.items()},
+    }
+    with open(path, "w") as f:
+        json.dump(data, f, indent=2, sort_keys=True)
+
+
+def load_baseline(path: str) -> Dict[str, Measurement]:
+    with open(path) as f:
+        data = json.load(f)
+    if data.get("version") != BASELINE_VERSION:
+        raise ValueError(f"{path} is baseline version {data.get('version')}, "
+                         f"expected {BASELINE_VERSION}")
+    return {
+        name: Measurement(**values)
+        for name, values in data["results"].items()
+    }
+
+
+def compare(results: Dict[str, Measurement],
+            baseline: Dict[str, Measurement],
+            threshold: float = 0.1) -> List[Regression]:
+    """Cases slower, or using more memory per roll, than the baseline by
+    more than `threshold`. Cases missing from either side are skipped."""
+    regressions = []
+    for name, m in results.items():
+        base = baseline.get(name)
+        if base is None:
+            continue
+        slowdown = base.rolls_per_sec / m.rolls_per_sec - 1
+        if slowdown > threshold:
+            regressions.append(
+                Regression(name, "rolls_per_sec", base.rolls_per_sec,
+                           m.rolls_per_sec, slowdown))
+        if base.bytes_per_roll > 0:
+            growth = m.bytes_per_roll / base.bytes_per_roll - 1
+            if growth > threshold:
+                regressions.append(
+                    Regression(name, "bytes_per_roll", base.bytes_per_roll,
+                               m.bytes_per_roll, growth))
+    return regressions
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="python -m craps.benchmark",
+        description="Measure simulator throughput and memory per roll.")
+    parser.add_argument("--baseline",
+                        default="benchmark.json",
+                        help="baseline JSON to compare against or save to")
+    parser.add_argument("--save",
+                        action="store_true",
+                        help="write the results as the new baseline")
+    parser.add_argument("--threshold",
+                        type=float,
+                        default=0.1,
+                        help="relative change reported as a regression")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--quick",
+                        action="store_true",
+                        help="a tenth of the rolls per case")
+    parser.add_argument("--filter",
+                        default="",
+                        help="only cases whose name contains this")
+    args = parser.parse_args(argv)
+
+    cases = [c for c in default_cases(args.quick) if args.filter in c.name]
+    results = run(cases, args.repeat)
+    if args.save:
+        save_baseline(args.baseline, results)
+        print(f"Saved baseline to {args.baseline}")
+        return 0
+
+    try:
+        baseline = load_baseline(args.baseline)
+    except FileNotFoundError:
+        print(f"No baseline at {args.baseline}, run with --save first")
+        return 0
+    regressions = compare(results, baseline, args.threshold)
+    for r in regressions:
+        print(f"REGRESSION {r.name} {r.metric}: {r.baseline:,.1f} -> "
+              f"{r.current:,.1f} ({r.change:+.1%})")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,334 @@
+import functools
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import time
+import types
+from typing import Any, List, Optional
+from craps.runner import TrialConfig, TrialResults, run_trials
+
+# Bump when the layout of an entry changes
+CACHE_VERSION = 1
+DEFAULT_DIRECTORY = os.environ.get(
+    "CRAPS_CACHE_DIR", os.path.join(os.path.expanduser("~"), ".cache",
+                                    "craps"))
+DEFAULT_MAX_BYTES = 1 << 30
+
+_META = "meta.json"
+
+_code_version: Optional[str] = None
+
+
+class Uncacheable(ValueError):
+    """The run's results cannot be reproduced from its configuration."""
+    pass
+
+
+def code_version() -> str:
+    """A hash of every module in this package, so entries written by other
+    code are never read back."""
+    global _code_version
+    if _code_version is None:
+        package = os.path.dirname(os.path.abspath(__file__))
+        digest = hashlib.sha256()
+        for name in sorted(os.listdir(package)):
+            if name.endswith(".py"):
+                digest.update(name.encode())
+                with open(os.path.join(package, name), "rb") as f:
+                    digest.update(f.read())
+        _code_version = digest.hexdigest()
+    return _code_version
+
+
+def describe(obj: Any) -> Any:
+    """A JSON value that identifies what `obj` does in a run.
+
+    Classes and functions are named by module and qualified name, partials
+    by their function and arguments, and other objects by their class and
+    public attributes. Raises Uncacheable for lambdas, closures and
+    objects marked `reproducible = False`, such as a WallClock stop rule.
+    """
+    if obj is None or isinstance(obj, (bool, int, str)):
+        return obj
+    if isinstance(obj, float):
+        # repr round trips, and keeps nan and inf valid JSON
+        return {"float": repr(obj)}
+    if isinstance(obj, (list, tuple)):
+        items = [describe(item) for item in obj]
+        if type(obj) in (list, tuple):
+            return items
+        # NamedTuples
+        return {"type": _name(type(obj)), "items": items}
+    if isinstance(obj, dict):
+        return {
+            "dict": _sorted([describe(k), describe(v)]
+                            for k, v in obj.items())
+        }
+    if isinstance(obj, (set, frozenset)):
+        return {"set": _sorted(describe(item) for item in obj)}
+    if isinstance(obj, functools.partial):
+        return {
+            "partial": describe(obj.func),
+            "args": describe(obj.args),
+            "keywords": describe(obj.keywords)
+        }
+    if isinstance(obj, (type, types.FunctionType, types.BuiltinFunctionType)):
+        return _name(obj)
+    if not getattr(obj, "reproducible", True):
+        raise Uncacheable(f"{obj} is not reproducible")
+    state = {
+        key: value
+        for key, value in getattr(obj, "__dict__", {}).items()
+        if not key.startswith("_")
+    }
+    return {"type": _name(type(obj)), "state": describe(state)}
+
+
+def _sorted(values) -> List[Any]:
+    return sorted(values, key=lambda v: json.dumps(v, sort_keys=True))
+
+
+def _name(obj: Any) -> str:
+    qualname = getattr(obj, "__qualname__", repr(obj))
+    if "<" in qualname:
+        raise Uncacheable(f"{qualname} has no stable name")
+    return f"{obj.__module__}.{qualname}"
+
+
+def cache_key(config: TrialConfig,
+              num_trials: int,
+              seed: int,
+              first_trial: int = 0) -> str:
+    """The content address of `run_trials(config, num_trials, seed, ...,
+    first_trial)`. The process count and chunk size do not change results
+    so are not part of it."""
+    data = {
+        "cache_version": CACHE_VERSION,
+        "code_version": code_version(),
+        "config": describe(config),
+        "num_trials": num_trials,
+        "seed": seed,
+        "first_trial": first_trial
+    }
+    text = json.dumps(data, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(text.encode()).hexdigest()
+
+
+class ResultCache():
+    """Trial results on disk, one directory of .npy files per key.
+
+    Hits are memory-mapped rather than read, so opening an entry costs
+    about the same at any size. When the entries add up to more than
+    `max_bytes` the least recently used are removed.
+    """
+
+    def __init__(self,
+                 directory: str = DEFAULT_DIRECTORY,
+                 max_bytes: int = DEFAULT_MAX_BYTES) -> None:
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, key)
+
+    def __contains__(self, key: str) -> bool:
+        return os.path.exists(os.path.join(self._path(key), _META))
+
+    def get(self, key: str) -> Optional[TrialResults]:
+        results = self._read(key)
+        if results is None:
+            self.misses += 1
+            return None
+        # Reading does not update mtime, which orders eviction
+        os.utime(os.path.join(self._path(key), _META))
+        self.hits += 1
+        return results
+
+    def _read(self, key: str) -> Optional[TrialResults]:
+        import numpy  # type: ignore
+        path = self._path(key)
+        try:
+            with open(os.path.join(path, _META)) as f:
+                meta = json.load(f)
+            arrays = {
+                name: _load(numpy, os.path.join(path, f"{name}.npy"))
+                for name in meta["arrays"]
+            }
+            trajectories = None
+            if "trajectories" in arrays:
+                flat = arrays["trajectories"]
+                offsets = arrays["offsets"]
+                trajectories = [
+                    flat[offsets[i]:offsets[i + 1]]
+                    for i in range(len(offsets) - 1)
+                ]
+            return TrialResults(meta["seed"], arrays["end_wallets"],
+                                arrays["lifetimes"], trajectories)
+        except OSError:
+            return None
+        except (KeyError, TypeError, ValueError):
+            # A damaged entry or one from an older layout, removed so the
+            # run is played and stored again
+            shutil.rmtree(path, ignore_errors=True)
+            return None
+
+    def put(self, key: str, results: TrialResults) -> None:
+        import numpy  # type: ignore
+        arrays = {
+            "end_wallets": _compact(numpy, results.end_wallets),
+            "lifetimes": numpy.asarray(results.lifetimes, dtype=numpy.int64)
+        }
+        if results.trajectories is not None:
+            lengths = [len(t) for t in results.trajectories]
+            arrays["offsets"] = numpy.concatenate(
+                ([0], numpy.cumsum(lengths, dtype=numpy.int64)))
+            arrays["trajectories"] = _compact(
+                numpy,
+                numpy.concatenate(results.trajectories)
+                if results.trajectories else [])
+        os.makedirs(self.directory, exist_ok=True)
+        # Written aside and renamed into place, so readers never see a
+        # partial entry
+        staging = tempfile.mkdtemp(prefix=".tmp-", dir=self.directory)
+        try:
+            for name, array in arrays.items():
+                numpy.save(os.path.join(staging, f"{name}.npy"), array)
+            size = sum(
+                os.path.getsize(os.path.join(staging, f"{name}.npy"))
+                for name in arrays)
+            meta = {
+                "seed": results.seed,
+                "arrays": sorted(arrays),
+                "bytes": size,
+                "created": time.time()
+            }
+            with open(os.path.join(staging, _META), "w") as f:
+                json.dump(meta, f)
+            try:
+                os.rename(staging, self._path(key))
+            except OSError:
+                # Another process stored the same key first
+                pass
+        finally:
+            if os.path.exists(staging):
+                shutil.rmtree(staging, ignore_errors=True)
+        self.evict()
+
+    def entries(self) -> List[str]:
+        if not os.path.isdir(self.directory):
+            return []
+        return [
+            name for name in os.listdir(self.directory)
+            if not name.startswith(".") and name in self
+        ]
+
+    def size(self) -> int:
+        return sum(self._entry_bytes(key) for key in self.entries())
+
+    def _entry_bytes(self, key: str) -> int:
+        path = self._path(key)
+        return sum(
+            os.path.getsize(os.path.join(path, name))
+            for name in os.listdir(path))
+
+    def evict(self, max_bytes: Optional[int] = None) -> List[str]:
+        """Remove least recently used entries until the rest fit in
+        `max_bytes`, by default the cache's limit. Returns the removed
+        keys."""
+        if max_bytes is None:
+            max_bytes = self.max_bytes
+        entries = []
+        for key in self.entries():
+            used = os.path.getmtime(os.path.join(self._path(key), _META))
+            entries.append((used, key, self._entry_bytes(key)))
+        total = sum(size for _, _, size in entries)
+        removed = []
+        for _, key, size in sorted(entries):
+            if total <= max_bytes:
+                break
+            shutil.rmtree(self._path(key), ignore_errors=True)
+            total -= size
+            removed.append(key)
+        return removed
+
+    def clear(self) -> None:
+        self.evict(0)
+
+
+def _compact(numpy, values) -> Any:
+    """float32 when that loses nothing, as for whole dollar wallets under
+    $16M, else float64."""
+    array = numpy.asarray(values, dtype=numpy.float64)
+    narrow = array.astype(numpy.float32)
+    if numpy.array_equal(narrow, array):
+        return narrow
+    return array
+
+
+def _as_arrays(results: TrialResults) -> TrialResults:
+    """`results` as the read-only arrays a cache hit returns."""
+    import numpy  # type: ignore
+
+    def frozen(array):
+        array.setflags(write=False)
+        return array
+
+    trajectories = None
+    if results.trajectories is not None:
+        trajectories = [
+            frozen(_compact(numpy, t)) for t in results.trajectories
+        ]
+    return TrialResults(
+        results.seed, frozen(_compact(numpy, results.end_wallets)),
+        frozen(numpy.asarray(results.lifetimes, dtype=numpy.int64)),
+        trajectories)
+
+
+def _load(numpy, path: str) -> Any:
+    try:
+        return numpy.load(path, mmap_mode="r")
+    except ValueError:
+        # Empty arrays cannot be mapped
+        return numpy.load(path)
+
+
+def cached_run_trials(config: TrialConfig,
+                      num_trials: int,
+                      seed: Optional[int] = None,
+                      processes: Optional[int] = None,
+                      chunksize: Optional[int] = None,
+                      first_trial: int = 0,
+                      cache: Optional[ResultCache] = None) -> TrialResults:
+    """`run_trials`, read from `cache` when the same run has been stored.
+
+    Results come back as read-only numpy arrays. Runs without a seed, or
+    whose configuration cannot be described (see `describe`), are played
+    and not stored.
+    """
+    if seed is None:
+        return _as_arrays(
+            run_trials(config, num_trials, seed, processes, chunksize,
+                       first_trial))
+    if cache is None:
+        cache = ResultCache()
+    try:
+        key = cache_key(config, num_trials, seed, first_trial)
+    except Uncacheable:
+        return _as_arrays(
+            run_trials(config, num_trials, seed, processes, chunksize,
+                       first_trial))
+    results = cache.get(key)
+    if results is None:
+        played = run_trials(config, num_trials, seed, processes, chunksize,
+                            first_trial)
+        cache.put(key, played)
+        # Read back so a miss returns the same mapped arrays as a hit. An
+        # entry larger than the cache is evicted as soon as it is stored.
+        results = cache._read(key)
+        if results is None:
+            results = _as_arrays(played)
+    return results
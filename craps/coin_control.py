@@ -1,4 +1,4 @@
-from typing import List, Optional
+from typing import Any, List, Optional, Tuple
 import random
 
 
@@ -23,3 +23,96 @@ def coin_control(wallet: int,
         results.append(wallet)
         i += 1
     return results
+
+
+# Flips drawn per round are capped at about this many across all trials
+BATCH_ELEMENTS = 1 << 22
+
+
+def _steps(gen, shape: Tuple[int, int], min_bet: int, bias: float):
+    import numpy  # type: ignore
+    flips = gen.integers(0, 2, size=shape, dtype=numpy.int8)
+    # 1 wins min_bet * bias, 0 loses min_bet
+    return flips * (min_bet * bias + min_bet) - min_bet
+
+
+def _until_ruin(wallet: float, min_bet: int, bias: float, num_trials: int,
+                gen, keep_paths: bool):
+    """Flip every trial in chunks until it is out of money.
+
+    Like `coin_control` with iterations=None, a trial flips once more
+    after the flip that ruins it, so its lifetime is that flip's index
+    plus two.
+    """
+    import numpy  # type: ignore
+    assert bias < 1, "This will never end if bias >= 1"
+    lifetimes = numpy.zeros(num_trials, dtype=numpy.int64)
+    pieces: List[List[Any]] = [[] for _ in range(num_trials)]
+    if wallet <= 0:
+        steps = _steps(gen, (num_trials, 1), min_bet, bias)
+        lifetimes[:] = 1
+        return lifetimes, [wallet + s for s in steps]
+
+    current = numpy.full(num_trials, float(wallet))
+    active = numpy.arange(num_trials)
+    flips = 0
+    chunk = 256
+    while active.size:
+        # One extra column for the flip after ruin
+        steps = _steps(gen, (active.size, chunk + 1), min_bet, bias)
+        path = current[active, None] + numpy.cumsum(steps[:, :chunk], axis=1)
+        ruined = path <= 0
+        hit = ruined.any(axis=1)
+        first = ruined.argmax(axis=1)
+        lifetimes[active[hit]] = flips + first[hit] + 2
+        if keep_paths:
+            for row, trial in enumerate(active):
+                if hit[row]:
+                    end = first[row] + 1
+                    pieces[trial].append(path[row, :end])
+                    pieces[trial].append(path[row, end - 1:end] +
+                                         steps[row, end])
+                else:
+                    pieces[trial].append(path[row])
+        current[active[~hit]] = path[~hit, -1]
+        active = active[~hit]
+        flips += chunk
+        if active.size:
+            chunk = max(256, min(chunk * 2, BATCH_ELEMENTS // active.size))
+    paths = None
+    if keep_paths:
+        paths = [numpy.concatenate(p) for p in pieces]
+    return lifetimes, paths
+
+
+def coin_control_paths(wallet: int,
+                       iterations: Optional[int],
+                       min_bet: int,
+                       bias: float = 1,
+                       num_trials: int = 1,
+                       seed: Any = None):
+    """Wallet after every flip for `num_trials` coin_control runs at once.
+
+    With a number of iterations this is a (num_trials, iterations + 1)
+    array. With None every trial runs until it is out of money and a list
+    of one array per trial is returned.
+    """
+    import numpy  # type: ignore
+    gen = numpy.random.default_rng(seed)
+    if iterations is None:
+        return _until_ruin(wallet, min_bet, bias, num_trials, gen, True)[1]
+    steps = _steps(gen, (num_trials, iterations + 1), min_bet, bias)
+    return wallet + numpy.cumsum(steps, axis=1)
+
+
+def coin_control_lifetimes(wallet: int,
+                           min_bet: int,
+                           bias: float,
+                           num_trials: int = 1,
+                           seed: Any = None):
+    """Flips until ruin for `num_trials` coin_control runs, without keeping
+    the paths. Equal to `len(coin_control(wallet, None, min_bet, bias))`
+    in distribution."""
+    import numpy  # type: ignore
+    gen = numpy.random.default_rng(seed)
+    return _until_ruin(wallet, min_bet, bias, num_trials, gen, False)[0]
@@ -0,0 +1,95 @@
+import random
+from typing import Callable, List, NamedTuple, Optional, Sequence, Tuple
+from craps.runner import TrialConfig, map_chunks, plan_chunks, run_trial
+from craps.stats import Interval, mean_interval
+from craps.strategy import Strategy
+
+
+class Comparison(NamedTuple):
+    seed: int
+    names: List[str]
+    antithetic: bool
+    # end_wallets[s][i] is strategy s in trial i. With antithetic pairs
+    # each trial is the mean of the original and mirrored dice.
+    end_wallets: List[List[float]]
+    lifetimes: List[List[float]]
+
+    def _metric(self, metric: str) -> List[List[float]]:
+        if metric not in ("end_wallets", "lifetimes"):
+            raise ValueError(f"Unknown metric {metric}")
+        return getattr(self, metric)
+
+    def interval(self,
+                 strategy: int,
+                 confidence: float = 0.95,
+                 metric: str = "end_wallets") -> Interval:
+        return mean_interval(self._metric(metric)[strategy], confidence)
+
+    def difference(self,
+                   a: int,
+                   b: int,
+                   confidence: float = 0.95,
+                   metric: str = "end_wallets") -> Interval:
+        """Mean of strategy a minus strategy b over paired trials."""
+        values = self._metric(metric)
+        return mean_interval([x - y for x, y in zip(values[a], values[b])],
+                             confidence)
+
+    def summary(self,
+                baseline: int = 0,
+                confidence: float = 0.95,
+                metric: str = "end_wallets"
+                ) -> List[Tuple[str, Interval, Interval]]:
+        """(name, mean, difference from `baseline`) for every strategy."""
+        return [(name, self.interval(i, confidence, metric),
+                 self.difference(i, baseline, confidence, metric))
+                for i, name in enumerate(self.names)]
+
+
+def _run_chunk(args) -> List[List[Tuple[float, float]]]:
+    configs, seed, trials, antithetic = args
+    rows = []
+    for trial in trials:
+        row = []
+        for config in configs:
+            result = run_trial(config, seed, trial)
+            if antithetic:
+                mirror = run_trial(config, seed, trial, antithetic=True)
+                row.append(((result.end_wallet + mirror.end_wallet) / 2,
+                            (result.lifetime + mirror.lifetime) / 2))
+            else:
+                row.append((result.end_wallet, result.lifetime))
+        rows.append(row)
+    return rows
+
+
+def compare(strategies: Sequence[Callable[[], Strategy]],
+            num_trials: int,
+            config: Optional[TrialConfig] = None,
+            seed: Optional[int] = None,
+            antithetic: bool = False,
+            processes: Optional[int] = None,
+            chunksize: Optional[int] = None) -> Comparison:
+    """Play every strategy on the same dice in each trial.
+
+    Trial `i` rolls the stream derived from `(seed, i)` for every
+    strategy, so differences between strategies are measured on common
+    random numbers. With `antithetic` each trial is also played on the
+    mirrored dice and the two results averaged. `config` supplies
+    everything but the strategy.
+    """
+    if config is None:
+        config = TrialConfig(strategies[0])
+    if seed is None:
+        seed = random.SystemRandom().getrandbits(63)
+    configs = [config._replace(strategy=s) for s in strategies]
+    processes, chunks = plan_chunks(num_trials, processes, chunksize)
+    jobs = [(configs, seed, trials, antithetic) for trials in chunks]
+    rows = [row for chunk in map_chunks(_run_chunk, jobs, processes)
+            for row in chunk]
+    end_wallets = [[row[s][0] for row in rows]
+                   for s in range(len(strategies))]
+    lifetimes = [[row[s][1] for row in rows]
+                 for s in range(len(strategies))]
+    names = [str(s()) for s in strategies]
+    return Comparison(seed, names, antithetic, end_wallets, lifetimes)
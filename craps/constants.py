@@ -22,3 +22,33 @@ NUM_TO_FIELD = {
     9: "NINE",
     10: "TEN",
 }
+
+# Fixed integer ids for every bet slot on the table. Bet amounts live in a
+# table-level Ledger indexed by (seat, field id).
+FIELD_NAMES = (
+    "PASS_LINE",
+    "PASS_ODDS",
+    "COME",
+    "FOUR_COME",
+    "FIVE_COME",
+    "SIX_COME",
+    "EIGHT_COME",
+    "NINE_COME",
+    "TEN_COME",
+    "FOUR_PLACE",
+    "FIVE_PLACE",
+    "SIX_PLACE",
+    "EIGHT_PLACE",
+    "NINE_PLACE",
+    "TEN_PLACE",
+    "FOUR_ODDS",
+    "FIVE_ODDS",
+    "SIX_ODDS",
+    "EIGHT_ODDS",
+    "NINE_ODDS",
+    "TEN_ODDS",
+    "FIELD",
+)
+FIELD_IDS = {name: i for i, name in enumerate(FIELD_NAMES)}
+NUM_FIELDS = len(FIELD_NAMES)
+POINT_NUMS = (4, 5, 6, 8, 9, 10)
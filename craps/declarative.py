@@ -0,0 +1,278 @@
+from bisect import bisect_right
+from itertools import product
+from typing import (Dict, List, NamedTuple, Optional, Sequence, Set,
+                    Tuple, Union)
+from craps.action import Action, ActionBuffer, Bet, BET
+from craps.constants import (COME_OUT, POINT, FIELD_IDS, NUM_TO_FIELD,
+                             POINT_NUMS)
+from craps.game import place_bet_amount
+from craps.strategy import Strategy
+
+POINTS = (0, ) + POINT_NUMS
+
+
+class Rule(NamedTuple):
+    """Bets placed when every condition holds, then its `then` rules.
+
+    Amounts are in units of MIN_BET, SIX and EIGHT place bets are rounded
+    up to a multiple of 6 like `Craps.place_bets`.
+    """
+    bets: Tuple[Tuple[str, float], ...] = ()
+    then: Tuple[Union["Rule", "FirstOf"], ...] = ()
+    phase: Optional[bool] = None
+    # The point must be one of / none of these, 0 while coming out
+    points: Optional[Tuple[int, ...]] = None
+    not_points: Tuple[int, ...] = ()
+    empty: Tuple[str, ...] = ()
+    occupied: Tuple[str, ...] = ()
+    # Place numbers without a bet, or covered by being the point
+    clear: Tuple[int, ...] = ()
+    flags: Tuple[Tuple[str, bool], ...] = ()
+    set_flags: Tuple[Tuple[str, bool], ...] = ()
+    # Wallet bounds in units of MIN_BET, min inclusive and max exclusive
+    min_wallet: Optional[float] = None
+    max_wallet: Optional[float] = None
+
+
+class FirstOf(NamedTuple):
+    """Only the first rule whose own conditions hold applies."""
+    rules: Tuple[Rule, ...]
+
+
+Node = Union[Rule, FirstOf]
+
+
+class _State(NamedTuple):
+    point: int
+    occupied: frozenset
+    flags: Dict[str, bool]
+    wallet: float
+
+
+class Decision(NamedTuple):
+    bets: Tuple[Tuple[str, float], ...]
+    set_flags: Tuple[Tuple[str, bool], ...]
+
+
+def _place_name(num: int) -> str:
+    return f"{NUM_TO_FIELD[num]}_PLACE"
+
+
+def _matches(rule: Rule, state: _State) -> bool:
+    if rule.phase is not None and rule.phase != bool(state.point):
+        return False
+    if rule.points is not None and state.point not in rule.points:
+        return False
+    if state.point in rule.not_points:
+        return False
+    if any(name in state.occupied for name in rule.empty):
+        return False
+    if any(name not in state.occupied for name in rule.occupied):
+        return False
+    for num in rule.clear:
+        if _place_name(num) in state.occupied and num != state.point:
+            return False
+    for name, value in rule.flags:
+        if state.flags.get(name, False) != value:
+            return False
+    if rule.min_wallet is not None and state.wallet < rule.min_wallet:
+        return False
+    if rule.max_wallet is not None and state.wallet >= rule.max_wallet:
+        return False
+    return True
+
+
+def _evaluate(nodes: Sequence[Node], state: _State,
+              bets: List[Tuple[str, float]],
+              set_flags: List[Tuple[str, bool]]) -> None:
+    for node in nodes:
+        if isinstance(node, FirstOf):
+            for rule in node.rules:
+                if _matches(rule, state):
+                    _evaluate([rule], state, bets, set_flags)
+                    break
+        elif _matches(node, state):
+            bets.extend(node.bets)
+            set_flags.extend(node.set_flags)
+            _evaluate(node.then, state, bets, set_flags)
+
+
+def _walk(nodes: Sequence[Node]) -> List[Rule]:
+    rules: List[Rule] = []
+    for node in nodes:
+        children = node.rules if isinstance(node, FirstOf) else node.then
+        if isinstance(node, Rule):
+            rules.append(node)
+        rules += _walk(children)
+    return rules
+
+
+class CompiledStrategy(Strategy):
+    """A declarative strategy compiled into a state -> decision table.
+
+    The state is (point, which referenced fields hold money, flags, wallet
+    bucket). Every combination is evaluated once in `__init__`, so
+    `next_actions` is a key computation and a dict lookup.
+    """
+    buffered = True
+
+    def __init__(self,
+                 rules: Sequence[Node],
+                 initial_flags: Optional[Dict[str, bool]] = None,
+                 name: str = "CompiledStrategy") -> None:
+        self.rules = tuple(rules)
+        self.initial_flags = dict(initial_flags or {})
+        self.name = name
+
+        all_rules = _walk(self.rules)
+        fields: Set[str] = set()
+        flags = set(self.initial_flags)
+        thresholds = set()
+        for rule in all_rules:
+            fields.update(rule.empty, rule.occupied)
+            fields.update(_place_name(num) for num in rule.clear)
+            flags.update(name for name, _ in rule.flags + rule.set_flags)
+            for bound in (rule.min_wallet, rule.max_wallet):
+                if bound is not None:
+                    thresholds.add(bound)
+        self.fields = tuple(sorted(fields, key=FIELD_IDS.__getitem__))
+        self.flag_names = tuple(sorted(flags))
+        # Flags live in strategy_state, which CachedStrategy does not key on
+        self.deterministic = not self.flag_names
+        self.thresholds = tuple(sorted(thresholds))
+        self.field_mask = sum(1 << FIELD_IDS[name] for name in self.fields)
+        # Lowest wallet in each bucket, in units of MIN_BET
+        bucket_floors = (float("-inf"), ) + self.thresholds
+
+        self.table: Dict[tuple, Decision] = {}
+        for point in POINTS:
+            for held in product((False, True), repeat=len(self.fields)):
+                occupied = frozenset(
+                    name for name, h in zip(self.fields, held) if h)
+                mask = sum(1 << FIELD_IDS[name] for name in occupied)
+                for flag_values in product((False, True),
+                                           repeat=len(self.flag_names)):
+                    for bucket, floor in enumerate(bucket_floors):
+                        state = _State(point, occupied,
+                                       dict(zip(self.flag_names,
+                                                flag_values)), floor)
+                        bets: List[Tuple[str, float]] = []
+                        set_flags: List[Tuple[str, bool]] = []
+                        _evaluate(self.rules, state, bets, set_flags)
+                        key = (point, mask, flag_values, bucket)
+                        self.table[key] = Decision(tuple(bets),
+                                                   tuple(set_flags))
+        self._bound: Dict[tuple, List[Action]] = {}
+        self._ops: Dict[tuple, List[int]] = {}
+        self._min_bet: Optional[int] = None
+
+    def amount(self, field_name: str, units: float, min_bet: int) -> int:
+        return place_bet_amount(int(units * min_bet), field_name)
+
+    def bind(self, min_bet: int) -> None:
+        """Build the Bet objects for every decision at this MIN_BET."""
+        if self._min_bet == min_bet:
+            return
+        self._min_bet = min_bet
+        self._bound = {
+            key: [
+                Bet(name, self.amount(name, units, min_bet))
+                for name, units in decision.bets
+            ]
+            for key, decision in self.table.items()
+        }
+        self._ops = {}
+        for key, actions in self._bound.items():
+            ops: List[int] = []
+            for bet in actions:
+                assert isinstance(bet, Bet)
+                ops += (BET, bet.field_id, bet.amount)
+            self._ops[key] = ops
+
+    def init_strategy(self, game, player) -> None:
+        self.bind(game.MIN_BET)
+        player.strategy_state.update(self.initial_flags)
+
+    def key(self, point: int, occupied: int, flags: Dict[str, bool],
+            wallet_units: float) -> tuple:
+        return (point, occupied & self.field_mask,
+                tuple(flags.get(name, False) for name in self.flag_names),
+                bisect_right(self.thresholds, wallet_units))
+
+    def _decide(self, game, player) -> tuple:
+        state = player.strategy_state
+        assert player.seat is not None, f"{player.name} has no seat"
+        key = self.key(game.point or 0, game.ledger.occupied(player.seat),
+                       state, player.wallet / game.MIN_BET)
+        set_flags = self.table[key].set_flags
+        if set_flags:
+            state.update(set_flags)
+        return key
+
+    def next_actions(self, game, player) -> List[Action]:
+        return self._bound[self._decide(game, player)]
+
+    def write_actions(self, game, player, buffer: ActionBuffer) -> None:
+        buffer.ops += self._ops[self._decide(game, player)]
+
+    def __str__(self) -> str:
+        return self.name
+
+
+def _bet_place(num: int) -> Rule:
+    name = _place_name(num)
+    return Rule(bets=((name, 1), ), empty=(name, ), not_points=(num, ))
+
+
+IRON_CROSS_RULES: Tuple[Node, ...] = (
+    Rule(phase=COME_OUT,
+         empty=("PASS_LINE", ),
+         set_flags=(("bet_field", False), ),
+         then=(
+             Rule(bets=(("FIELD", 1), ), empty=("FIELD", )),
+             Rule(bets=(("PASS_LINE", 1), )),
+         )),
+    Rule(phase=POINT,
+         then=(
+             _bet_place(6),
+             _bet_place(8),
+             Rule(bets=(("FIELD", 1), ), empty=("FIELD", )),
+         )),
+)
+
+COLOR_UP_RULES: Tuple[Node, ...] = (
+    Rule(phase=COME_OUT,
+         empty=("PASS_LINE", ),
+         bets=(("PASS_LINE", 1), ),
+         set_flags=(("bet_field", False), )),
+    Rule(phase=POINT,
+         then=(
+             _bet_place(6),
+             _bet_place(8),
+             FirstOf((
+                 Rule(clear=(4, 5, 9, 10),
+                      then=(
+                          Rule(bets=(("FIELD", 1), ),
+                               empty=("FIELD", ),
+                               flags=(("bet_field", False), ),
+                               set_flags=(("bet_field", True), )),
+                          Rule(empty=("FIELD", ),
+                               flags=(("bet_field", True), ),
+                               then=(_bet_place(5), )),
+                      )),
+                 Rule(clear=(4, 9, 10), then=(_bet_place(5), )),
+                 Rule(clear=(4, 10), then=(_bet_place(8), )),
+                 Rule(clear=(4, ), then=(_bet_place(10), )),
+                 Rule(then=(_bet_place(4), )),
+             )),
+         )),
+)
+
+
+def iron_cross() -> CompiledStrategy:
+    return CompiledStrategy(IRON_CROSS_RULES, name="IronCross")
+
+
+def color_up() -> CompiledStrategy:
+    return CompiledStrategy(COLOR_UP_RULES, {"bet_field": False},
+                            name="ColorUp")
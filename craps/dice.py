@@ -1,10 +1,186 @@
 import random
+import hashlib
+from typing import Any, List, Optional, Sequence, Tuple
 
+BUFFER_SIZE = 4096
 
-class Dice():
-    def __init__(self) -> None:
-        self.roll()
 
-    def roll(self) -> int:
-        self.value = random.randint(1, 6)
-        return self.value
+class DiceRng():
+    """A stream of dice pairs drawn from a buffer refilled in bulk.
+
+    Subclasses implement `_fill`, which returns a flat list of
+    `2 * buffer_size` die values in the range 1-6.
+    """
+
+    def __init__(self, buffer_size: int = BUFFER_SIZE) -> None:
+        self.buffer_size = buffer_size
+        self._buffer: List[int] = []
+        self._pos = 0
+
+    def roll(self) -> Tuple[int, int]:
+        pos = self._pos
+        if pos >= len(self._buffer):
+            self._buffer = self._fill(self.buffer_size)
+            pos = 0
+        self._pos = pos + 2
+        return self._buffer[pos], self._buffer[pos + 1]
+
+    def spawn(self, n: int) -> List["DiceRng"]:
+        raise NotImplementedError()
+
+    def jumped(self, jumps: int = 1) -> "DiceRng":
+        raise NotImplementedError()
+
+    def getstate(self) -> Any:
+        # Only the undrawn dice are kept, packed one per byte
+        return (self._backend_state(), bytes(self._buffer[self._pos:]))
+
+    def setstate(self, state: Any) -> None:
+        backend_state, buffer = state
+        self._set_backend_state(backend_state)
+        self._buffer = list(buffer)
+        self._pos = 0
+
+    def _fill(self, n: int) -> List[int]:
+        raise NotImplementedError()
+
+    def _backend_state(self) -> Any:
+        raise NotImplementedError()
+
+    def _set_backend_state(self, state: Any) -> None:
+        raise NotImplementedError()
+
+
+class NumpyDiceRng(DiceRng):
+    """Dice drawn from a NumPy bit generator (PCG64, Philox, ...)."""
+
+    def __init__(self,
+                 seed: Any = None,
+                 spawn_key: Sequence[int] = (),
+                 bit_generator: str = "PCG64",
+                 buffer_size: int = BUFFER_SIZE) -> None:
+        super().__init__(buffer_size)
+        import numpy  # type: ignore
+        self.bit_generator_name = bit_generator
+        self.seed_seq = numpy.random.SeedSequence(seed,
+                                                  spawn_key=tuple(spawn_key))
+        bit_gen = getattr(numpy.random, bit_generator)(self.seed_seq)
+        self._gen = numpy.random.Generator(bit_gen)
+
+    def _fill(self, n: int) -> List[int]:
+        return self._gen.integers(1, 7, size=2 * n, dtype="int8").tolist()
+
+    def spawn(self, n: int) -> List[DiceRng]:
+        return [
+            NumpyDiceRng(seq.entropy, seq.spawn_key, self.bit_generator_name,
+                         self.buffer_size) for seq in self.seed_seq.spawn(n)
+        ]
+
+    def jumped(self, jumps: int = 1) -> DiceRng:
+        rng = NumpyDiceRng(self.seed_seq.entropy, self.seed_seq.spawn_key,
+                           self.bit_generator_name, self.buffer_size)
+        rng._gen = type(self._gen)(
+            self._gen.bit_generator.jumped(jumps))  # type: ignore
+        return rng
+
+    def _backend_state(self) -> Any:
+        return self._gen.bit_generator.state
+
+    def _set_backend_state(self, state: Any) -> None:
+        self._gen.bit_generator.state = state
+
+
+class RandomDiceRng(DiceRng):
+    """Dice drawn from a private `random.Random`, used without NumPy."""
+
+    def __init__(self,
+                 seed: Any = None,
+                 spawn_key: Sequence[int] = (),
+                 buffer_size: int = BUFFER_SIZE) -> None:
+        super().__init__(buffer_size)
+        self.seed = seed
+        self.spawn_key = tuple(spawn_key)
+        self._num_spawned = 0
+        if seed is None or self.spawn_key:
+            self._random = random.Random(_derive_seed(seed, self.spawn_key))
+        else:
+            self._random = random.Random(seed)
+
+    def _fill(self, n: int) -> List[int]:
+        randint = self._random.randint
+        return [randint(1, 6) for _ in range(2 * n)]
+
+    def spawn(self, n: int) -> List[DiceRng]:
+        if self.seed is None:
+            self.seed = self._random.getrandbits(128)
+        start = self._num_spawned
+        self._num_spawned += n
+        return [
+            RandomDiceRng(self.seed, self.spawn_key + (i, ), self.buffer_size)
+            for i in range(start, start + n)
+        ]
+
+    def jumped(self, jumps: int = 1) -> DiceRng:
+        raise NotImplementedError("random.Random cannot jump ahead, "
+                                  "use spawn() or the numpy backend")
+
+    def _backend_state(self) -> Any:
+        return self._random.getstate()
+
+    def _set_backend_state(self, state: Any) -> None:
+        self._random.setstate(state)
+
+
+class AntitheticDiceRng(DiceRng):
+    """Mirrors another stream, every die d becomes 7 - d.
+
+    A table rolling the mirrored stream sees each total t as 14 - t, so
+    pairing it with the original cancels much of the dice noise.
+    """
+
+    def __init__(self, rng: DiceRng) -> None:
+        super().__init__(rng.buffer_size)
+        self.rng = rng
+
+    def _fill(self, n: int) -> List[int]:
+        return [7 - d for d in self.rng._fill(n)]
+
+    def spawn(self, n: int) -> List[DiceRng]:
+        return [AntitheticDiceRng(rng) for rng in self.rng.spawn(n)]
+
+    def jumped(self, jumps: int = 1) -> DiceRng:
+        return AntitheticDiceRng(self.rng.jumped(jumps))
+
+    def _backend_state(self) -> Any:
+        return self.rng.getstate()
+
+    def _set_backend_state(self, state: Any) -> None:
+        self.rng.setstate(state)
+
+
+def _derive_seed(seed: Any, spawn_key: Tuple[int, ...]) -> int:
+    if seed is None:
+        return random.SystemRandom().getrandbits(128)
+    digest = hashlib.sha256(repr((seed, spawn_key)).encode()).digest()
+    return int.from_bytes(digest[:16], "little")
+
+
+def make_rng(seed: Any = None,
+             spawn_key: Sequence[int] = (),
+             backend: Optional[str] = None,
+             buffer_size: int = BUFFER_SIZE) -> DiceRng:
+    """Build a dice stream.
+
+    `backend` is a NumPy bit generator name ("PCG64", "Philox", ...) or
+    "random" for the standard library. By default NumPy's PCG64 is used
+    when NumPy is installed.
+    """
+    if backend is None:
+        try:
+            import numpy  # type: ignore # noqa
+            backend = "PCG64"
+        except ImportError:
+            backend = "random"
+    if backend == "random":
+        return RandomDiceRng(seed, spawn_key, buffer_size)
+    return NumpyDiceRng(seed, spawn_key, backend, buffer_size)
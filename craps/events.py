@@ -0,0 +1,131 @@
+import logging
+from typing import Any, Callable, List
+
+# Subscriber signatures, every callback gets the table first:
+#
+#   TURN(game)                                   before players act
+#   BET_PLACED(game, player, field_name, amount)
+#   BET_MOVED(game, player, from_field_name, to_field_name, amount)
+#   ROLL(game, dice)
+#   POINT_ESTABLISHED(game, point)
+#   SEVEN_OUT(game)
+#   BET_SETTLED(game, player, field_name, bet, win)   win < 0 is a loss
+#   ROLL_SETTLED(game)                           after settlement
+TURN = "turn"
+BET_PLACED = "bet_placed"
+BET_MOVED = "bet_moved"
+ROLL = "roll"
+POINT_ESTABLISHED = "point_established"
+SEVEN_OUT = "seven_out"
+BET_SETTLED = "bet_settled"
+ROLL_SETTLED = "roll_settled"
+
+EVENTS = (TURN, BET_PLACED, BET_MOVED, ROLL, POINT_ESTABLISHED, SEVEN_OUT,
+          BET_SETTLED, ROLL_SETTLED)
+
+Callback = Callable[..., None]
+
+
+class Hooks():
+    """Subscriber lists for every table event.
+
+    The game loop only checks whether a list is non-empty before building
+    an event, so a table with no subscribers pays one attribute test per
+    emit site.
+    """
+    __slots__ = EVENTS
+
+    def __init__(self) -> None:
+        self.turn: List[Callback] = []
+        self.bet_placed: List[Callback] = []
+        self.bet_moved: List[Callback] = []
+        self.roll: List[Callback] = []
+        self.point_established: List[Callback] = []
+        self.seven_out: List[Callback] = []
+        self.bet_settled: List[Callback] = []
+        self.roll_settled: List[Callback] = []
+
+    def subscribe(self, event: str, callback: Callback) -> Callback:
+        getattr(self, event).append(callback)
+        return callback
+
+    def unsubscribe(self, event: str, callback: Callback) -> None:
+        getattr(self, event).remove(callback)
+
+    def emit(self, event: str, *args: Any) -> None:
+        for callback in getattr(self, event):
+            callback(*args)
+
+
+class DebugLogger():
+    """Prints every roll, bet and settlement, and the table after each roll.
+
+    Attached by `Craps(log_level=logging.DEBUG)`.
+    """
+
+    def __init__(self, log: logging.Logger) -> None:
+        self.log = log
+
+    def attach(self, hooks: Hooks) -> None:
+        hooks.subscribe(TURN, self.turn)
+        hooks.subscribe(BET_PLACED, self.bet_placed)
+        hooks.subscribe(BET_MOVED, self.bet_moved)
+        hooks.subscribe(ROLL, self.roll)
+        hooks.subscribe(POINT_ESTABLISHED, self.point_established)
+        hooks.subscribe(SEVEN_OUT, self.seven_out)
+        hooks.subscribe(BET_SETTLED, self.bet_settled)
+        hooks.subscribe(ROLL_SETTLED, self.print_game_status)
+
+    def turn(self, game) -> None:
+        if game.phase:
+            self.log.debug(f"---> ON: {game.point}")
+        else:
+            self.log.debug("---> OFF: COMING OUT")
+
+    def bet_placed(self, game, player, field_name: str, amount: int) -> None:
+        self.log.debug(f"---> {player.name} -> Betting {amount} on "
+                       f"{field_name}")
+
+    def bet_moved(self, game, player, from_field_name: str,
+                  to_field_name: str, amount: int) -> None:
+        self.log.debug(f"== PLAYER MOVE {amount} from {from_field_name} to "
+                       f"{to_field_name}")
+
+    def roll(self, game, dice: int) -> None:
+        self.log.debug(f"---> Rolled {dice}")
+
+    def point_established(self, game, point: int) -> None:
+        self.log.debug(f"---> ESTABLISH POINT: {point}")
+
+    def seven_out(self, game) -> None:
+        self.log.debug("---> SEVEN OUT")
+
+    def bet_settled(self, game, player, field_name: str, bet: int,
+                    win: float) -> None:
+        if win < 0:
+            self.log.debug(f"XXXX Player LOSE: {bet} ON {field_name}")
+        else:
+            self.log.debug(f"!!!! Player WIN on {field_name}: {bet} bet + "
+                           f"{win} win = {bet + win}")
+
+    def print_game_status(self, game) -> None:
+        for player in game.players:
+            self.log.debug("================================")
+            come_nums = [str(f.get(player)) for f in game.point_num_fields()]
+            come_odds = [str(f.get(player)) for f in game.point_odds_fields()]
+            place_nums = [str(f.get(player)) for f in game.place_num_fields()]
+            self.log.debug(f"= {' - '.join(come_nums)}")
+            self.log.debug(f"= {' - '.join(come_odds)}")
+            self.log.debug(f"= {' - '.join(place_nums)}")
+            self.log.debug("= ----------------------------")
+            self.log.debug(f"= FIELD: {game.fields['FIELD'].get(player)}")
+            self.log.debug("= ----------------------------")
+            self.log.debug(f"= COME: {game.fields['COME'].get(player)}")
+            self.log.debug("= ---------------------------- =")
+            pline = game.fields['PASS_LINE'].get(player)
+            podds = game.fields['PASS_ODDS'].get(player)
+            self.log.debug(f"= PASS: {pline} | {podds}")
+            self.log.debug("= ---------------------------- =")
+            self.log.debug(f"= {player}")
+            self.log.debug(f"= iteration {game.iteration}")
+            self.log.debug("================================\n\n")
@@ -1,12 +1,94 @@
-from typing import Dict
-from collections import defaultdict
+from typing import Dict, List, Optional, Set
 from craps.player import Player
+from craps.constants import FIELD_IDS, NUM_FIELDS
+
+
+class Ledger():
+    """Every bet on a table as one flat players x fields integer matrix.
+
+    The amount a seated player has on a field lives at
+    `amounts[player.seat * NUM_FIELDS + field_id]`. Which slots hold money
+    is indexed both ways, `seat_fields[seat]` is a bitmask of field ids and
+    `field_seats[field_id]` the set of seats, so settling a field only
+    touches live bets. Amounts must only be changed through the Ledger.
+    """
+
+    def __init__(self) -> None:
+        self.players: List[Player] = []
+        self.amounts: List[int] = []
+        self.seat_fields: List[int] = []
+        self.field_seats: List[Set[int]] = [set() for _ in range(NUM_FIELDS)]
+
+    def add_player(self, player: Player) -> int:
+        seat = len(self.players)
+        self.players.append(player)
+        self.amounts.extend([0] * NUM_FIELDS)
+        self.seat_fields.append(0)
+        player.seat = seat
+        return seat
+
+    def get(self, seat: int, field_id: int) -> int:
+        return self.amounts[seat * NUM_FIELDS + field_id]
+
+    def add(self, seat: int, field_id: int, amount: int) -> None:
+        i = seat * NUM_FIELDS + field_id
+        self.amounts[i] += amount
+        if self.amounts[i]:
+            self.seat_fields[seat] |= 1 << field_id
+            self.field_seats[field_id].add(seat)
+
+    def deduct(self, seat: int, field_id: int) -> int:
+        i = seat * NUM_FIELDS + field_id
+        amount = self.amounts[i]
+        self.amounts[i] = 0
+        self.seat_fields[seat] &= ~(1 << field_id)
+        self.field_seats[field_id].discard(seat)
+        return amount
+
+    def take_field(self, field_id: int) -> List[int]:
+        """The seats with a bet on `field_id` in seat order, after marking
+        those bets settled. The caller reads and zeroes the amounts."""
+        live = self.field_seats[field_id]
+        if not live:
+            return []
+        seats = sorted(live)
+        live.clear()
+        keep = ~(1 << field_id)
+        seat_fields = self.seat_fields
+        for seat in seats:
+            seat_fields[seat] &= keep
+        return seats
+
+    def field_total(self, field_id: int) -> int:
+        return sum(self.amounts[field_id::NUM_FIELDS])
+
+    def row(self, seat: int) -> List[int]:
+        start = seat * NUM_FIELDS
+        return self.amounts[start:start + NUM_FIELDS]
+
+    def occupied(self, seat: int) -> int:
+        """Bitmask of the field ids `seat` has money on."""
+        return self.seat_fields[seat]
+
+    def snapshot(self) -> List[int]:
+        return list(self.amounts)
+
+    def restore(self, amounts: List[int]) -> None:
+        self.amounts[:] = amounts
+        self.seat_fields = [0] * len(self.players)
+        self.field_seats = [set() for _ in range(NUM_FIELDS)]
+        for i, amount in enumerate(amounts):
+            if amount:
+                seat, field_id = divmod(i, NUM_FIELDS)
+                self.seat_fields[seat] |= 1 << field_id
+                self.field_seats[field_id].add(seat)
 
 
 class Field():
-    def __init__(self, name: str):
+    def __init__(self, name: str, ledger: Optional[Ledger] = None):
         self.name = name
-        self.values: Dict[Player, int] = defaultdict(int)
+        self.id = FIELD_IDS[name]
+        self.ledger = ledger if ledger is not None else Ledger()
 
     def __str__(self) -> str:
         disp = ""
@@ -14,19 +96,31 @@ class Field():
             disp += f"{player.name}: {amount}"
         return f"{self.name}: {disp}"
 
+    @property
+    def values(self) -> Dict[Player, int]:
+        return {
+            player: self.ledger.get(seat, self.id)
+            for seat, player in enumerate(self.ledger.players)
+        }
+
     def get(self, player: Player) -> int:
-        return self.values.get(player, 0)
+        if player.seat is None:
+            return 0
+        return self.ledger.amounts[player.seat * NUM_FIELDS + self.id]
 
     def add(self, player: Player, amount: int = 0):
-        self.values[player] += amount
+        assert player.seat is not None, f"{player.name} has no seat"
+        self.ledger.add(player.seat, self.id, amount)
 
     def deduct(self, player: Player):
-        amount = self.values.get(player, 0)
-        self.values[player] = 0
-        return amount
+        assert player.seat is not None, f"{player.name} has no seat"
+        return self.ledger.deduct(player.seat, self.id)
 
 
 class OddsField(Field):
-    def __init__(self, name: str, max_odds: int):
-        super().__init__(name)
+    def __init__(self,
+                 name: str,
+                 max_odds: int,
+                 ledger: Optional[Ledger] = None):
+        super().__init__(name, ledger)
         self.max_odds = max_odds
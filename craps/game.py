@@ -1,37 +1,45 @@
+import copy
+import pickle
 import logging
-from typing import Optional, Dict, List, Union
-from typing_extensions import TypedDict
+from typing import Any, Optional, Dict, List, Sequence, Tuple, Union
 from collections import defaultdict
-from craps.dice import Dice
-from craps.field import Field, OddsField
+from craps.bankroll import Bankroll
+from craps.dice import DiceRng, make_rng
+from craps import events
+from craps.events import Hooks, DebugLogger, Callback
+from craps.field import Field, OddsField, Ledger
+from craps.history import GameHistory, Recorder  # noqa
+from craps.instrument import Instrumentation
 from craps.player import Player
-from craps.action import Action, Bet, Move
-from craps.constants import POINT, COME_OUT, NUM_TO_FIELD
-
-
-ODDS_PAYOUT = {
-    "FOUR_ODDS": 2,
-    "FIVE_ODDS": 3/2,
-    "SIX_ODDS": 6/5,
-    "EIGHT_ODDS": 6/5,
-    "NINE_ODDS": 3/2,
-    "TEN_ODDS": 2,
-}
-
-PLACE_PAYOUT = {
-    "FOUR_PLACE": 9/5,
-    "FIVE_PLACE": 7/5,
-    "SIX_PLACE": 7/6,
-    "EIGHT_PLACE": 7/6,
-    "NINE_PLACE": 7/5,
-    "TEN_PLACE": 9/5,
+from craps.stop import StopRule
+from craps.action import Action, ActionBuffer, BET, MOVE
+from craps.constants import (COME_OUT, NUM_TO_FIELD, FIELD_NAMES, FIELD_IDS,
+                             NUM_FIELDS, POINT, POINT_NUMS)
+from craps.rules import ODDS_PAYOUT, PLACE_PAYOUT  # noqa
+from craps.rules import (WIN, LOSE, ESTABLISH_POINT, SEVEN_OUT, RuleTable,
+                         default_rules)
+
+
+PASS_LINE_ID = FIELD_IDS["PASS_LINE"]
+
+MAX_ODDS = {
+    "FOUR_ODDS": 3,
+    "FIVE_ODDS": 4,
+    "SIX_ODDS": 5,
+    "EIGHT_ODDS": 5,
+    "NINE_ODDS": 4,
+    "TEN_ODDS": 3,
 }
 
 
-class GameHistory(TypedDict):
-    dice: int
-    phase: bool
-    wallet: int
+def place_bet_amount(min_bet: int, field_name: str) -> int:
+    if field_name in ["SIX_PLACE", "EIGHT_PLACE"]:
+        mult_6_bet = 0
+        while mult_6_bet < min_bet:
+            mult_6_bet += 6
+        return mult_6_bet
+    else:
+        return min_bet
 
 
 class IllegalAction(Exception):
@@ -42,340 +50,393 @@ class Craps():
     def __init__(self,
                  min_bet: int,
                  field_multiplier: int = 3,
-                 log_level: int = logging.INFO) -> None:
+                 log_level: int = logging.INFO,
+                 rng: Optional[DiceRng] = None,
+                 seed: Any = None,
+                 rules: Optional[RuleTable] = None,
+                 history: Optional[Recorder] = None,
+                 max_odds: Optional[int] = None) -> None:
         self.phase: bool = COME_OUT
         self.MIN_BET = min_bet
-        logging.basicConfig(level=log_level)
+        self.log_level = log_level
         self.log = logging.getLogger("Craps")
-        self.log.setLevel(log_level)
+        # Subscribers for table events, see craps.events
+        self.hooks = Hooks()
+        if log_level <= logging.DEBUG:
+            logging.basicConfig(level=log_level)
+            self.log.setLevel(log_level)
+            DebugLogger(self.log).attach(self.hooks)
 
         # The amount the Field pays on 12. Defaults to 3x
         self.FIELD_MULTIPLIER = field_multiplier
+        # Every settlement, indexed by [point or 0][dice]. See craps.rules
+        self.rules = rules if rules is not None else default_rules(
+            field_multiplier)
 
         self.point: Optional[int] = None
-        self.d1 = Dice()
-        self.d2 = Dice()
-        self.house_wins = 0
-        self.house_losses = 0
+        # Each table owns its dice stream. Pass `rng` to share a backend
+        # configuration or `seed` for a reproducible table.
+        self.rng: DiceRng = rng if rng is not None else make_rng(seed)
+        self.d1 = 0
+        self.d2 = 0
+        self.house_wins: float = 0
+        self.house_losses: float = 0
         self.iteration = 0
         self.players: List[Player] = []
-        self.fields: Dict[str, Field] = {
-            "PASS_LINE": Field("PASS_LINE"),
-            "PASS_ODDS": Field("PASS_ODDS"),
-            "COME": Field("COME"),
-            "FOUR_COME": Field("FOUR_COME"),
-            "FIVE_COME": Field("FIVE_COME"),
-            "SIX_COME": Field("SIX_COME"),
-            "EIGHT_COME": Field("EIGHT_COME"),
-            "NINE_COME": Field("NINE_COME"),
-            "TEN_COME": Field("TEN_COME"),
-            "FOUR_PLACE": Field("FOUR_PLACE"),
-            "FIVE_PLACE": Field("FIVE_PLACE"),
-            "SIX_PLACE": Field("SIX_PLACE"),
-            "EIGHT_PLACE": Field("EIGHT_PLACE"),
-            "NINE_PLACE": Field("NINE_PLACE"),
-            "TEN_PLACE": Field("TEN_PLACE"),
-            "FOUR_ODDS": OddsField("FOUR_ODDS", max_odds=3),
-            "FIVE_ODDS": OddsField("FIVE_ODDS", max_odds=4),
-            "SIX_ODDS": OddsField("SIX_ODDS", max_odds=5),
-            "EIGHT_ODDS": OddsField("EIGHT_ODDS", max_odds=5),
-            "NINE_ODDS": OddsField("NINE_ODDS", max_odds=4),
-            "TEN_ODDS": OddsField("TEN_ODDS", max_odds=3),
-            "FIELD": Field("FIELD"),
+        # Reused by strategies that write opcodes instead of Actions
+        self.action_buffer = ActionBuffer()
+        self.ledger = Ledger()
+        self.fields: Dict[str, Field] = {}
+        # Odds allowed behind every point as a multiple of the line bet.
+        # None is the usual 3-4-5x
+        self.MAX_ODDS = max_odds
+        for name in FIELD_NAMES:
+            if name in MAX_ODDS:
+                odds = MAX_ODDS[name] if max_odds is None else max_odds
+                self.fields[name] = OddsField(name, odds, self.ledger)
+            else:
+                self.fields[name] = Field(name, self.ledger)
+        # Precomputed handles so hot paths never format field names
+        self.field_by_id = tuple(self.fields[name] for name in FIELD_NAMES)
+        self.come_fields = {
+            n: self.fields[f"{NUM_TO_FIELD[n]}_COME"]
+            for n in POINT_NUMS
+        }
+        self.place_fields = {
+            n: self.fields[f"{NUM_TO_FIELD[n]}_PLACE"]
+            for n in POINT_NUMS
         }
-        self.game_history: List[GameHistory] = []
-        self.player_win_lose: Dict[str, int] = defaultdict(int)
+        self.odds_fields: Dict[int, OddsField] = {
+            n: self.fields[f"{NUM_TO_FIELD[n]}_ODDS"]  # type: ignore
+            for n in POINT_NUMS
+        }
+        self._point_num_fields = tuple(self.come_fields.values())
+        self._place_num_fields = tuple(self.place_fields.values())
+        self._point_odds_fields = tuple(self.odds_fields.values())
+        # Per-roll dice, phase and total wallet, see craps.history for
+        # sampled, bounded and on-disk recorders
+        self.game_history = history if history is not None else Recorder()
+        self.player_win_lose: Dict[str, float] = defaultdict(int)
         self.field_win_lose: Dict[str, Dict[str, float]] = defaultdict(
             lambda: defaultdict(float))
         self.rolls: Dict[int, int] = defaultdict(int)
+        # Wallet totals and extremes, updated as money moves
+        self.bankroll = Bankroll()
+        # Stage timers and counters, see instrument()
+        self.instrumentation: Optional[Instrumentation] = None
 
     def join(self, player: Player) -> None:
+        self.ledger.add_player(player)
+        assert player.seat is not None, f"{player.name} has no seat"
+        self.bankroll.join(player.seat, player.wallet)
         player.strategy.init_strategy(self, player)
         self.players.append(player)
 
-    def dice(self) -> int:
-        return self.d1.value + self.d2.value
+    def snapshot(self) -> bytes:
+        """Everything needed to resume this table, including the dice.
+
+        Recorded history, subscribers and strategy objects are not part
+        of a snapshot, strategies keep their state in `strategy_state`.
+        """
+        state = {
+            "phase": self.phase,
+            "point": self.point,
+            "dice": (self.d1, self.d2),
+            "iteration": self.iteration,
+            "house": (self.house_wins, self.house_losses),
+            "player_win_lose": dict(self.player_win_lose),
+            "field_win_lose": {
+                name: dict(stats)
+                for name, stats in self.field_win_lose.items()
+            },
+            "rolls": dict(self.rolls),
+            "bets": self.ledger.snapshot(),
+            "players": [(p.wallet, p.strategy_state) for p in self.players],
+            "bankroll": self.bankroll.snapshot(),
+            "rng": self.rng.getstate(),
+        }
+        return pickle.dumps(state, pickle.HIGHEST_PROTOCOL)
+
+    def restore(self, snapshot: bytes) -> None:
+        state = pickle.loads(snapshot)
+        if len(state["players"]) != len(self.players):
+            raise ValueError(f"Snapshot has {len(state['players'])} players, "
+                             f"table has {len(self.players)}")
+        self.phase = state["phase"]
+        self.point = state["point"]
+        self.d1, self.d2 = state["dice"]
+        self.iteration = state["iteration"]
+        self.house_wins, self.house_losses = state["house"]
+        self.player_win_lose = defaultdict(int, state["player_win_lose"])
+        self.field_win_lose = defaultdict(lambda: defaultdict(float))
+        for name, stats in state["field_win_lose"].items():
+            self.field_win_lose[name].update(stats)
+        self.rolls = defaultdict(int, state["rolls"])
+        self.ledger.restore(state["bets"])
+        for player, (wallet, strategy_state) in zip(self.players,
+                                                    state["players"]):
+            player.wallet = wallet
+            player.strategy_state = strategy_state
+        self.bankroll.restore(state["bankroll"])
+        self.rng.setstate(state["rng"])
+
+    def fork(self,
+             rng: Optional[DiceRng] = None,
+             history: Optional[Recorder] = None) -> "Craps":
+        """A new table in exactly this state, sharing nothing with it.
+
+        The fork rolls the same dice as this table unless given its own
+        `rng`, e.g. one of `game.rng.spawn(n)`. It starts with an empty
+        history recorder like this one and no subscribers.
+        """
+        game = Craps(self.MIN_BET,
+                     field_multiplier=self.FIELD_MULTIPLIER,
+                     log_level=self.log_level,
+                     rng=copy.deepcopy(self.rng),
+                     rules=self.rules,
+                     history=(history if history is not None else
+                              self.game_history.empty()),
+                     max_odds=self.MAX_ODDS)
+        for player in self.players:
+            game.join(
+                Player(player.name, player.wallet,
+                       copy.copy(player.strategy)))
+        game.restore(self.snapshot())
+        if rng is not None:
+            game.rng = rng
+        return game
+
+    def subscribe(self, event: str, callback: Callback) -> Callback:
+        return self.hooks.subscribe(event, callback)
+
+    def unsubscribe(self, event: str, callback: Callback) -> None:
+        self.hooks.unsubscribe(event, callback)
+
+    def instrument(self, enabled: bool = True) -> Optional[Instrumentation]:
+        """Time every stage of `start` and count settlements.
+
+        Returns the table's Instrumentation, which accumulates across
+        calls to `start` until instrumentation is disabled.
+        """
+        if enabled and self.instrumentation is None:
+            self.instrumentation = Instrumentation()
+            self.instrumentation.attach(self)
+        elif not enabled and self.instrumentation is not None:
+            self.instrumentation.detach(self)
+            self.instrumentation = None
+        return self.instrumentation
 
-    def start(self, max_iterations: Optional[int]) -> None:
+    def dice(self) -> int:
+        return self.d1 + self.d2
+
+    def start(self,
+              max_iterations: Optional[int],
+              stop: Optional[StopRule] = None) -> None:
+        """Play until `max_iterations`, or with None until the players are
+        out of money, or until `stop` says to before a roll."""
+        if stop is not None:
+            stop.reset(self)
+        # One loop whether or not the table is instrumented, instrument()
+        # only swaps the stages for timed versions
+        if self.instrumentation is not None:
+            act, shoot, settle, record = self.instrumentation.stages(self)
+        else:
+            act, shoot, settle, record = (self._performPlayerActions,
+                                          self._shoot, self._settle,
+                                          self._record_game_history)
+        hooks = self.hooks
+        bankroll = self.bankroll
         cond = True
         while cond:
+            if stop is not None and stop(self):
+                break
             if max_iterations is None:
-                cond = self.total_player_money() > 0
+                cond = bankroll.total > 0
             else:
                 cond = self.iteration < max_iterations
-            if self.phase:
-                self.log.debug(f"---> ON: {self.point}")
-            else:
-                self.log.debug(f"---> OFF: COMING OUT")
-            self._performPlayerActions()
-            self._shoot()
-            self.log.debug(f"---> Rolled {self.dice()}")
-            self._reconcile()
-            if self.log.getEffectiveLevel() <= logging.DEBUG:
-                self._print_game_status()
-            self._record_game_history()
+            if hooks.turn:
+                hooks.emit(events.TURN, self)
+            act()
+            shoot()
+            settle()
+            if self.iteration >= self.game_history.next_record:
+                record()
             self.iteration += 1
 
     def place_bets(self, field: Union[Field, str]) -> int:
-        name = field
-        if isinstance(field, Field):
-            name = field.name
-        if name in ["SIX_PLACE", "EIGHT_PLACE"]:
-            mult_6_bet = 0
-            while mult_6_bet < self.MIN_BET:
-                mult_6_bet += 6
-            return mult_6_bet
-        else:
-            return self.MIN_BET
-
-    def place_num_fields(self) -> List[Field]:
-        return [
-            self.fields[f"{f}_PLACE"]
-            for f in ["FOUR", "FIVE", "SIX", "EIGHT", "NINE", "TEN"]
-        ]
-
-    def point_num_fields(self) -> List[Field]:
-        return [
-            self.fields[f"{f}_COME"]
-            for f in ["FOUR", "FIVE", "SIX", "EIGHT", "NINE", "TEN"]
-        ]
-
-    def point_odds_fields(self) -> List[Field]:
-        return [
-            self.fields[f"{f}_ODDS"]
-            for f in ["FOUR", "FIVE", "SIX", "EIGHT", "NINE", "TEN"]
-        ]
+        name = field.name if isinstance(field, Field) else field
+        return place_bet_amount(self.MIN_BET, name)
 
-    def is_empty(self, field_name: str, player: Player) -> bool:
-        return self.fields[field_name].get(player) == 0
+    def place_num_fields(self) -> Tuple[Field, ...]:
+        return self._place_num_fields
 
-    def total_player_money(self) -> int:
-        return sum([p.wallet for p in self.players])
+    def point_num_fields(self) -> Tuple[Field, ...]:
+        return self._point_num_fields
 
-    def _print_game_status(self) -> None:
-        for player in self.players:
-            self.log.debug(f"================================")
-            come_nums = [str(f.get(player)) for f in self.point_num_fields()]
-            come_odds = [str(f.get(player)) for f in self.point_odds_fields()]
-            place_nums = [str(f.get(player)) for f in self.place_num_fields()]
-            self.log.debug(f"= {' - '.join(come_nums)}")
-            self.log.debug(f"= {' - '.join(come_odds)}")
-            self.log.debug(f"= {' - '.join(place_nums)}")
-            self.log.debug(f"= ----------------------------")
-            self.log.debug(f"= FIELD: {self.fields['FIELD'].get(player)}")
-            self.log.debug(f"= ----------------------------")
-            self.log.debug(f"= COME: {self.fields['COME'].get(player)}")
-            self.log.debug(f"= ---------------------------- =")
-            pline = self.fields['PASS_LINE'].get(player)
-            podds = self.fields['PASS_ODDS'].get(player)
-            self.log.debug(f"= PASS: {pline} | {podds}")
-            self.log.debug(f"= ---------------------------- =")
-            self.log.debug(f"= {player}")
-            self.log.debug(f"= iteration {self.iteration}")
-            self.log.debug(f"================================\n\n")
+    def point_odds_fields(self) -> Tuple[OddsField, ...]:
+        return self._point_odds_fields
+
+    def is_empty(self, field_name: str, player: Player) -> bool:
+        seat = player.seat
+        assert seat is not None, f"{player.name} has not joined the table"
+        return self.ledger.get(seat, FIELD_IDS[field_name]) == 0
+
+    def total_player_money(self) -> float:
+        return self.bankroll.total
 
     def _record_game_history(self) -> None:
-        hist = GameHistory(
-            wallet=sum([p.wallet for p in self.players]),
-            dice=self.dice(),
-            phase=self.phase,
-        )
-        self.game_history.append(hist)
+        self.game_history.record(self.iteration, self.d1 + self.d2,
+                                 self.phase, self.total_player_money())
 
     def _shoot(self) -> None:
-        self.d1.roll()
-        self.d2.roll()
-        self.rolls[self.dice()] += 1
-
-    def _performPlayerActions(self) -> None:
-        for player in self.players:
-            actions = player.next_actions(self)
-            for action in actions:
-                self.log.debug(f"---> {player.name} -> {action}")
-            for action in actions:
-                self._performAction(action, player)
+        d1, d2 = self.d1, self.d2 = self.rng.roll()
+        self.rolls[d1 + d2] += 1
+        if self.hooks.roll:
+            self.hooks.emit(events.ROLL, self, d1 + d2)
+
+    def _settle(self) -> None:
+        self._reconcile()
+        bankroll = self.bankroll
+        if bankroll.total <= 0:
+            bankroll.ruined = True
+        if self.hooks.roll_settled:
+            self.hooks.emit(events.ROLL_SETTLED, self)
+
+    def _performPlayerActions(self,
+                              players: Optional[Sequence[Player]] = None
+                              ) -> None:
+        buffer = self.action_buffer
+        for player in players or self.players:
+            if player.strategy.buffered:
+                buffer.clear()
+                player.strategy.write_actions(self, player, buffer)
+                ops = buffer.ops
+                for i in range(0, len(ops), 3):
+                    if ops[i] == BET:
+                        self._place_bet(player, ops[i + 1], ops[i + 2])
+                    elif ops[i] == MOVE:
+                        self._move_bet(player, ops[i + 1], ops[i + 2])
+            else:
+                for action in player.next_actions(self):
+                    self._performAction(action, player)
 
     def _performAction(self, action: Action, player: Player) -> None:
-        if isinstance(action, Bet):
-            if self.phase is POINT and action.field_name == "PASS_LINE":
-                raise IllegalAction()
-            player.deduct(action.amount)
-            self.fields[action.field_name].add(player, action.amount)
-        if isinstance(action, Move):
-            amount = self.fields[action.from_field_name].deduct(player)
-            self.fields[action.to_field_name].add(player, amount)
+        opcode = action.opcode
+        if opcode == BET:
+            self._place_bet(player, action.field_id,  # type: ignore
+                            action.amount)  # type: ignore
+        elif opcode == MOVE:
+            self._move_bet(player, action.from_id,  # type: ignore
+                           action.to_id)  # type: ignore
+
+    def _place_bet(self, player: Player, field_id: int, amount: int) -> None:
+        if self.phase is POINT and field_id == PASS_LINE_ID:
+            raise IllegalAction()
+        seat = player.seat
+        assert seat is not None, f"{player.name} has not joined the table"
+        self.bankroll.withdraw(seat, player.deduct(amount), amount)
+        if amount:
+            # Ledger.add inlined, this runs for every bet placed
+            ledger = self.ledger
+            ledger.amounts[seat * NUM_FIELDS + field_id] += amount
+            ledger.seat_fields[seat] |= 1 << field_id
+            ledger.field_seats[field_id].add(seat)
+        if self.hooks.bet_placed:
+            self.hooks.emit(events.BET_PLACED, self, player,
+                            FIELD_NAMES[field_id], amount)
+
+    def _move_bet(self, player: Player, from_id: int, to_id: int) -> None:
+        seat = player.seat
+        assert seat is not None, f"{player.name} has not joined the table"
+        amount = self.ledger.deduct(seat, from_id)
+        self.ledger.add(seat, to_id, amount)
+        if self.hooks.bet_moved:
+            self.hooks.emit(events.BET_MOVED, self, player,
+                            FIELD_NAMES[from_id], FIELD_NAMES[to_id], amount)
 
     def _assert_before_coming_out(self) -> None:
         m1 = "No bets on COME when coming out"
-        assert sum(self.fields["COME"].values.values()) == 0, m1
+        assert not self.ledger.field_seats[FIELD_IDS["COME"]], m1
 
         m2 = "No bets on PASS_ODDS when coming out"
-        assert sum(self.fields["PASS_ODDS"].values.values()) == 0, m2
+        assert not self.ledger.field_seats[FIELD_IDS["PASS_ODDS"]], m2
 
     def _reconcile(self) -> None:
-        dice = self.dice()
         if self.phase is COME_OUT:
             self._assert_before_coming_out()
-            if dice in [2, 3, 12]:
-                self._crap_out()
-                self._field_win(dice)
-            elif dice in [4, 5, 6, 8, 9, 10]:
-                self._establish_point(dice)
-                if dice not in [5, 6, 7, 8]:
-                    self._field_win(dice)
-                else:
-                    self._player_lose("FIELD")
-            elif dice == 11:
-                self._natural()
-                self._field_win(dice)
-            elif dice == 7:
-                self._natural()
-                self._player_lose("FIELD")
-        elif self.phase is POINT:
-            if dice == 7:
-                self._come_win()
-                self._seven_out()
-            elif dice == 11:
-                self._come_win()
-                self._field_win(dice)
-            elif dice in [2, 3, 12]:
-                self._come_lose()
-                self._field_win(dice)
-            elif dice in [4, 5, 6, 8, 9, 10]:
-                if dice == self.point:
-                    self._pass_win()
-                    self._pass_odds_win()
-                    self._end_turn()
-                if dice not in [5, 6, 7, 8]:
-                    self._field_win(dice)
-                else:
-                    self._player_lose("FIELD")
-                self._place_number_win(dice)
-                self._come_number_win(dice)
-                self._come_odds_win(dice)
-                self._come_point_win(dice)
-                self._come_point_move(dice)
+        transition = self.rules[self.point or 0][self.d1 + self.d2]
+        assert transition is not None, f"No rule for {self.point}"
+        if transition.event is not None:
+            hooks = self.hooks
+            if transition.event == ESTABLISH_POINT and hooks.point_established:
+                hooks.emit(events.POINT_ESTABLISHED, self, transition.point)
+            elif transition.event == SEVEN_OUT and hooks.seven_out:
+                hooks.emit(events.SEVEN_OUT, self)
+        for op, field_id, arg in transition.settlements:
+            if op == WIN:
+                self._player_win(field_id, arg)
+            elif op == LOSE:
+                self._player_lose(field_id)
             else:
-                pass
+                self._move_all(field_id, int(arg))
+        self.phase = transition.phase
+        self.point = transition.point
 
-    def _player_win(self, field_name: str, multiplier: float) -> None:
+    def _player_win(self, field_id: int, multiplier: float) -> None:
+        field_name = FIELD_NAMES[field_id]
         self.field_win_lose[field_name]['win'] += 1.0
-        for player in self.fields[field_name].values:
-            bet = self.fields[field_name].deduct(player)
-            if bet == 0:
-                break
+        if not self.ledger.field_seats[field_id]:
+            return
+        seats = self.ledger.take_field(field_id)
+        on_settled = self.hooks.bet_settled
+        amounts = self.ledger.amounts
+        players = self.ledger.players
+        for seat in seats:
+            i = seat * NUM_FIELDS + field_id
+            bet = amounts[i]
+            amounts[i] = 0
+            player = players[seat]
             win = bet * multiplier
             self.house_losses += win
-            self.log.debug(f"!!!! Player WIN on {field_name}: {bet} bet + {win} win = {bet + win}")  # noqa
+            if on_settled:
+                self.hooks.emit(events.BET_SETTLED, self, player,
+                                field_name, bet, win)
             self.player_win_lose['win'] += win
             player.add(bet + win)
+            self.bankroll.deposit(seat, player.wallet, bet + win)
 
-    def _player_lose(self, field_name: str) -> None:
+    def _player_lose(self, field_id: int) -> None:
+        field_name = FIELD_NAMES[field_id]
         self.field_win_lose[field_name]['lose'] += 1.0
-        for player in self.fields[field_name].values:
-            amount = self.fields[field_name].get(player)
-            if amount > 0:
-                self.log.debug(f"XXXX Player LOSE: {amount} ON {field_name}")
-                self.player_win_lose['lose'] += amount
-            self.house_wins += self.fields[field_name].deduct(player)
-
-    def _establish_point(self, dice: int) -> None:
-        self.log.debug(f"---> ESTABLISH POINT: {dice}")
-        self.phase = POINT
-        self.point = dice
-
-    def _seven_out(self) -> None:
-        self.log.debug("---> SEVEN OUT")
-        self.phase = COME_OUT
-        self.point = None
-        self._player_lose("PASS_LINE")
-        self._player_lose("PASS_ODDS")
-        self._player_lose("FOUR_COME")
-        self._player_lose("FIVE_COME")
-        self._player_lose("SIX_COME")
-        self._player_lose("EIGHT_COME")
-        self._player_lose("NINE_COME")
-        self._player_lose("TEN_COME")
-        self._player_lose("FOUR_ODDS")
-        self._player_lose("FIVE_ODDS")
-        self._player_lose("SIX_ODDS")
-        self._player_lose("EIGHT_ODDS")
-        self._player_lose("NINE_ODDS")
-        self._player_lose("TEN_ODDS")
-        self._player_lose("FOUR_PLACE")
-        self._player_lose("FIVE_PLACE")
-        self._player_lose("SIX_PLACE")
-        self._player_lose("EIGHT_PLACE")
-        self._player_lose("NINE_PLACE")
-        self._player_lose("TEN_PLACE")
-        self._player_lose("FIELD")
-
-    def _field_win(self, dice: int) -> None:
-        if dice in [3, 4, 9, 10, 11]:
-            self._player_win("FIELD", 1)
-        elif dice == 2:
-            self._player_win("FIELD", 2)
-        elif dice == 12:
-            self._player_win("FIELD", self.FIELD_MULTIPLIER)
-        else:
-            raise IllegalAction()
-
-    def _pass_win(self) -> None:
-        self._player_win("PASS_LINE", 1)
-
-    def _pass_odds_win(self) -> None:
-        if self.point is None:
-            raise IllegalAction()
-        odds_field_name = f"{NUM_TO_FIELD[self.point]}_ODDS"
-        self._player_win("PASS_ODDS", ODDS_PAYOUT[odds_field_name])
-
-    def _end_turn(self) -> None:
-        self.phase = COME_OUT
-        self.point = None
-
-    def _come_win(self) -> None:
-        self._player_win("COME", 1)
-
-    def _come_lose(self) -> None:
-        self._player_lose("COME")
-
-    def _come_number_win(self, dice: int) -> None:
-        self._player_win(f"{NUM_TO_FIELD[dice]}_COME", 1)
-
-    def _place_number_win(self, dice: int) -> None:
-        field_name = f"{NUM_TO_FIELD[dice]}_PLACE"
-        self._player_win(field_name, PLACE_PAYOUT[field_name])
-
-    def _come_odds_win(self, dice: int) -> None:
-        field_name = f"{NUM_TO_FIELD[dice]}_ODDS"
-        self._player_win(field_name, ODDS_PAYOUT[field_name])
-
-    def _come_number_lose(self) -> None:
-        for f in self.point_num_fields():
-            self._player_lose(f.name)
-
-    def _come_odds_lose(self) -> None:
-        for f in self.point_odds_fields():
-            self._player_lose(f.name)
-
-    def _move_all(self, from_field: str, to_field: str) -> None:
-        values = self.fields[from_field].values
-        self.fields[from_field].values = defaultdict(int)
-        for player, value in values.items():
-            if value > 0:
-                self.log.debug(
-                    f"== PLAYER MOVE {value} from {from_field} to {to_field}"
-                )
-            self.fields[to_field].add(player, value)
-
-    def _come_point_move(self, point: int) -> None:
-        self._move_all("COME", f"{NUM_TO_FIELD[point]}_COME")
-
-    def _come_point_win(self, point: int) -> None:
-        self._player_win(f"{NUM_TO_FIELD[point]}_COME", 1)
-
-    def _natural(self) -> None:
-        self._player_win("PASS_LINE", 1)
-
-    def _crap_out(self) -> None:
-        self._player_lose("PASS_LINE")
+        if not self.ledger.field_seats[field_id]:
+            return
+        seats = self.ledger.take_field(field_id)
+        on_settled = self.hooks.bet_settled
+        amounts = self.ledger.amounts
+        players = self.ledger.players
+        for seat in seats:
+            i = seat * NUM_FIELDS + field_id
+            amount = amounts[i]
+            amounts[i] = 0
+            if on_settled:
+                self.hooks.emit(events.BET_SETTLED, self, players[seat],
+                                field_name, amount, -amount)
+            self.player_win_lose['lose'] += amount
+            self.house_wins += amount
+
+    def _move_all(self, from_id: int, to_id: int) -> None:
+        ledger = self.ledger
+        if not ledger.field_seats[from_id]:
+            return
+        seats = ledger.take_field(from_id)
+        on_moved = self.hooks.bet_moved
+        amounts = ledger.amounts
+        for seat in seats:
+            i = seat * NUM_FIELDS + from_id
+            value = amounts[i]
+            amounts[i] = 0
+            if on_moved:
+                self.hooks.emit(events.BET_MOVED, self, ledger.players[seat],
+                                FIELD_NAMES[from_id], FIELD_NAMES[to_id],
+                                value)
+            ledger.add(seat, to_id, value)
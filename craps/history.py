@@ -0,0 +1,199 @@
+import os
+import sys
+import mmap
+from array import array
+from typing import Dict, Iterator, Sequence, Tuple, Union
+from typing_extensions import TypedDict
+
+# Column name -> array typecode
+COLUMNS = {
+    "iteration": "q",
+    "dice": "b",
+    "phase": "b",
+    "wallet": "d",
+}
+
+
+class GameHistory(TypedDict):
+    dice: int
+    phase: bool
+    wallet: float
+
+
+class Recorder():
+    """Per-roll game history stored column by column in typed arrays.
+
+    Craps calls `record` once `game.iteration` reaches `next_record`, so
+    recorders that skip rolls never pay for summing wallets. Rows can still
+    be read back as `GameHistory` dicts by index or iteration.
+    """
+
+    def __init__(self) -> None:
+        self.next_record = 0
+        self._columns: Dict[str, array] = {
+            name: array(code)
+            for name, code in COLUMNS.items()
+        }
+
+    def record(self, iteration: int, dice: int, phase: bool,
+               wallet: float) -> None:
+        self._columns["iteration"].append(iteration)
+        self._columns["dice"].append(dice)
+        self._columns["phase"].append(phase)
+        self._columns["wallet"].append(wallet)
+        self.next_record = iteration + 1
+
+    def empty(self) -> "Recorder":
+        """A new recorder with the same settings and no rows."""
+        return type(self)()
+
+    def column(self, name: str) -> Sequence:
+        return self._columns[name]
+
+    @property
+    def iteration(self) -> Sequence[int]:
+        return self.column("iteration")
+
+    @property
+    def dice(self) -> Sequence[int]:
+        return self.column("dice")
+
+    @property
+    def phase(self) -> Sequence[int]:
+        return self.column("phase")
+
+    @property
+    def wallet(self) -> Sequence[float]:
+        return self.column("wallet")
+
+    def __len__(self) -> int:
+        return len(self.column("dice"))
+
+    def __getitem__(self, i: int) -> GameHistory:
+        return GameHistory(dice=self.dice[i],
+                           phase=bool(self.phase[i]),
+                           wallet=self.wallet[i])
+
+    def __iter__(self) -> Iterator[GameHistory]:
+        for dice, phase, wallet in zip(self.dice, self.phase, self.wallet):
+            yield GameHistory(dice=dice, phase=bool(phase), wallet=wallet)
+
+
+class NoHistory(Recorder):
+    def __init__(self) -> None:
+        super().__init__()
+        self.next_record = sys.maxsize
+
+
+class EveryNthRoll(Recorder):
+    def __init__(self, every: int) -> None:
+        super().__init__()
+        self.every = every
+
+    def empty(self) -> Recorder:
+        return EveryNthRoll(self.every)
+
+    def record(self, iteration: int, dice: int, phase: bool,
+               wallet: float) -> None:
+        super().record(iteration, dice, phase, wallet)
+        self.next_record = iteration + self.every
+
+
+class LastRolls(Recorder):
+    """Ring buffer of the last `size` rolls."""
+
+    def __init__(self, size: int) -> None:
+        super().__init__()
+        self.size = size
+        self.count = 0
+        self._columns = {
+            name: array(code, [0]) * size
+            for name, code in COLUMNS.items()
+        }
+
+    def empty(self) -> Recorder:
+        return LastRolls(self.size)
+
+    def record(self, iteration: int, dice: int, phase: bool,
+               wallet: float) -> None:
+        i = self.count % self.size
+        self._columns["iteration"][i] = iteration
+        self._columns["dice"][i] = dice
+        self._columns["phase"][i] = phase
+        self._columns["wallet"][i] = wallet
+        self.count += 1
+        self.next_record = iteration + 1
+
+    def column(self, name: str) -> Sequence:
+        values = self._columns[name]
+        if self.count <= self.size:
+            return values[:self.count]
+        start = self.count % self.size
+        return values[start:] + values[:start]
+
+
+class SpillToDisk(Recorder):
+    """Full history flushed every `chunk_size` rolls to one file per column.
+
+    Columns are read back through read-only memory maps of
+    `<path>.<column>`. Call `close` to release the maps.
+    """
+
+    def __init__(self, path: str, chunk_size: int = 65536) -> None:
+        super().__init__()
+        self.path = path
+        self.chunk_size = chunk_size
+        self._maps: Dict[str, Tuple[mmap.mmap, memoryview]] = {}
+        self._num_forks = 0
+        for name in COLUMNS:
+            open(self._column_path(name), "wb").close()
+
+    def empty(self) -> Recorder:
+        self._num_forks += 1
+        return SpillToDisk(f"{self.path}.{self._num_forks}", self.chunk_size)
+
+    def _column_path(self, name: str) -> str:
+        return f"{self.path}.{name}"
+
+    def record(self, iteration: int, dice: int, phase: bool,
+               wallet: float) -> None:
+        super().record(iteration, dice, phase, wallet)
+        if len(self._columns["dice"]) >= self.chunk_size:
+            self.flush()
+
+    def flush(self) -> None:
+        if len(self._columns["dice"]) == 0:
+            return
+        self.close()
+        for name, values in self._columns.items():
+            with open(self._column_path(name), "ab") as f:
+                values.tofile(f)
+            del values[:]
+
+    def column(self, name: str) -> Union[memoryview, array]:
+        self.flush()
+        if name not in self._maps:
+            path = self._column_path(name)
+            if os.path.getsize(path) == 0:
+                return array(COLUMNS[name])
+            with open(path, "rb") as f:
+                mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            self._maps[name] = (mapped, memoryview(mapped).cast(
+                COLUMNS[name]))  # type: ignore
+        return self._maps[name][1]
+
+    def __len__(self) -> int:
+        dice = self._columns["dice"]
+        on_disk = os.path.getsize(self._column_path("dice")) // dice.itemsize
+        return on_disk + len(dice)
+
+    def close(self) -> None:
+        for mapped, view in self._maps.values():
+            try:
+                view.release()
+                mapped.close()
+            except BufferError:
+                # A caller still holds a slice of the column, the map is
+                # closed once it is garbage collected.
+                pass
+        self._maps = {}
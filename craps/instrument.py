@@ -0,0 +1,160 @@
+import sys
+import time
+from collections import defaultdict
+from typing import Any, Callable, Dict, TextIO, Tuple
+from craps import events
+
+STAGES = ("actions", "shoot", "reconcile", "record")
+# Settlement types, each counted overall and per strategy
+BETS_PLACED = "bets_placed"
+WINS = "wins"
+LOSSES = "losses"
+MOVES = "moves"
+SETTLEMENTS = (BETS_PLACED, WINS, LOSSES, MOVES)
+
+
+class Counter():
+    __slots__ = ("count", "amount")
+
+    def __init__(self) -> None:
+        self.count = 0
+        self.amount = 0.0
+
+    def add(self, amount: float) -> None:
+        self.count += 1
+        self.amount += amount
+
+
+class Instrumentation():
+    """Cumulative stage timers and settlement counters for one table.
+
+    Enabled with `Craps.instrument()`, which makes `start` run the timed
+    stages from `stages` and subscribes the counters to the table's
+    hooks. A table that is not instrumented runs the plain stages.
+    """
+
+    def __init__(self) -> None:
+        self.rolls = 0
+        self.stage_seconds: Dict[str, float] = dict.fromkeys(STAGES, 0.0)
+        # Time spent deciding and placing bets, by strategy name
+        self.strategy_seconds: Dict[str, float] = defaultdict(float)
+        self.strategy_turns: Dict[str, int] = defaultdict(int)
+        self.settlements: Dict[str, Counter] = {
+            name: Counter()
+            for name in SETTLEMENTS
+        }
+        self.strategy_settlements: Dict[str, Dict[str, Counter]] = \
+            defaultdict(lambda: {name: Counter() for name in SETTLEMENTS})
+
+    def attach(self, game) -> None:
+        game.subscribe(events.BET_PLACED, self._bet_placed)
+        game.subscribe(events.BET_MOVED, self._bet_moved)
+        game.subscribe(events.BET_SETTLED, self._bet_settled)
+
+    def detach(self, game) -> None:
+        game.unsubscribe(events.BET_PLACED, self._bet_placed)
+        game.unsubscribe(events.BET_MOVED, self._bet_moved)
+        game.unsubscribe(events.BET_SETTLED, self._bet_settled)
+
+    def stages(self, game) -> Tuple[Callable[[], None], ...]:
+        """The table's (actions, shoot, settle, record) stages, timed."""
+        clock = time.perf_counter
+        stage_seconds = self.stage_seconds
+        strategy_seconds = self.strategy_seconds
+        strategy_turns = self.strategy_turns
+        perform = game._performPlayerActions
+        players = [(player, str(player.strategy)) for player in game.players]
+
+        def actions() -> None:
+            start = clock()
+            for player, name in players:
+                t = clock()
+                perform((player, ))
+                strategy_seconds[name] += clock() - t
+                strategy_turns[name] += 1
+            stage_seconds["actions"] += clock() - start
+            self.rolls += 1
+
+        def timed(stage: str, func: Callable[[], None]) -> Callable[[], None]:
+            def run() -> None:
+                start = clock()
+                func()
+                stage_seconds[stage] += clock() - start
+
+            return run
+
+        return (actions, timed("shoot", game._shoot),
+                timed("reconcile", game._settle),
+                timed("record", game._record_game_history))
+
+    def _count(self, player, settlement: str, amount: float) -> None:
+        self.settlements[settlement].add(amount)
+        self.strategy_settlements[str(
+            player.strategy)][settlement].add(amount)
+
+    def _bet_placed(self, game, player, field_name: str, amount: int) -> None:
+        self._count(player, BETS_PLACED, amount)
+
+    def _bet_moved(self, game, player, from_field_name: str,
+                   to_field_name: str, amount: int) -> None:
+        self._count(player, MOVES, amount)
+
+    def _bet_settled(self, game, player, field_name: str, bet: int,
+                     win: float) -> None:
+        if win < 0:
+            self._count(player, LOSSES, bet)
+        else:
+            self._count(player, WINS, win)
+
+    def report(self) -> Dict[str, Any]:
+        total = sum(self.stage_seconds.values())
+        return {
+            "rolls": self.rolls,
+            "seconds": total,
+            "stages": {
+                stage: {
+                    "seconds": seconds,
+                    "share": seconds / total if total else 0.0,
+                    "us_per_roll": (seconds / self.rolls * 1e6
+                                    if self.rolls else 0.0),
+                }
+                for stage, seconds in self.stage_seconds.items()
+            },
+            "strategies": {
+                name: {
+                    "seconds": seconds,
+                    "turns": self.strategy_turns[name],
+                    "settlements": _counters(self.strategy_settlements[name]),
+                }
+                for name, seconds in self.strategy_seconds.items()
+            },
+            "settlements": _counters(self.settlements),
+        }
+
+    def dump(self, out: TextIO = sys.stdout) -> None:
+        report = self.report()
+        print(f"Rolls: {report['rolls']} in {report['seconds']:.3f}s",
+              file=out)
+        for stage, stats in report["stages"].items():
+            print(f"  {stage:<10} {stats['seconds']:>9.3f}s "
+                  f"{stats['share']:>6.1%} "
+                  f"{stats['us_per_roll']:>9.2f}us/roll",
+                  file=out)
+        for name, stats in report["strategies"].items():
+            print(f"  {name}: {stats['seconds']:.3f}s over "
+                  f"{stats['turns']} turns",
+                  file=out)
+            for settlement, counter in stats["settlements"].items():
+                print(f"    {settlement:<12} {counter['count']:>9} "
+                      f"{counter['amount']:>14,.1f}",
+                      file=out)
+
+
+def _counters(counters: Dict[str, Counter]) -> Dict[str, Dict[str, float]]:
+    return {
+        name: {
+            "count": c.count,
+            "amount": c.amount
+        }
+        for name, c in counters.items()
+    }
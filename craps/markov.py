@@ -0,0 +1,254 @@
+from collections import deque
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple
+from craps.constants import COME_OUT, POINT, ROLL_ODDS
+from craps.game import Craps
+from craps.history import NoHistory
+from craps.player import Player
+from craps.strategy import Strategy
+
+# Wallets are compared after rounding so that float payouts such as
+# 12 * 7/6 land on the same state.
+WALLET_DIGITS = 6
+
+# (point or 0, bets on the table by field id, wallet, strategy_state)
+State = Tuple[int, Tuple[int, ...], float, Tuple[Tuple[str, Any], ...]]
+# Without SciPy, chains up to this many states are solved densely
+DENSE_STATES = 4096
+
+
+class Solution(NamedTuple):
+    num_states: int
+    # Rolls until the wallet is empty or reaches max_wallet. A Craps table
+    # started with max_iterations=None plays one more roll than this.
+    expected_lifetime: float
+    ruin_probability: float
+    # Probability of reaching max_wallet before going broke
+    escape_probability: float
+    # lifetime_pmf[n] is the probability of going broke on roll n + 1
+    lifetime_pmf: List[float]
+
+
+class Chain():
+    """The absorbing Markov chain of one player's bankroll.
+
+    Transient states are (point, bets, wallet, strategy state) seen just
+    before the player acts. States are enumerated by replaying the
+    strategy on a real `Craps` table for each of the 11 dice totals, so the
+    strategy must decide from those alone. A wallet at or below zero is
+    ruin, at or above `max_wallet` is escape.
+    """
+
+    def __init__(self,
+                 strategy: Strategy,
+                 min_bet: int,
+                 wallet: float,
+                 max_wallet: float,
+                 field_multiplier: int = 3,
+                 max_states: int = 1000000,
+                 max_odds: Optional[int] = None) -> None:
+        self.max_wallet = max_wallet
+        self.game = Craps(min_bet,
+                          field_multiplier=field_multiplier,
+                          history=NoHistory(),
+                          max_odds=max_odds)
+        self.player = Player(name="Markov", wallet=wallet, strategy=strategy)
+        self.game.join(self.player)
+        self.initial = self._read()
+
+        self.index: Dict[State, int] = {self.initial: 0}
+        # rows[i] holds (j, p) for transient successors of state i
+        self.rows: List[List[Tuple[int, float]]] = []
+        self.ruin: List[float] = []
+        self.escape: List[float] = []
+        self._transitions: Optional[Transitions] = None
+        queue = deque([self.initial])
+        while queue:
+            self._expand(queue.popleft(), queue)
+            if len(self.index) > max_states:
+                raise ValueError(f"More than {max_states} states, lower "
+                                 "max_wallet or raise max_states")
+
+    def _read(self) -> State:
+        game, player = self.game, self.player
+        assert player.seat is not None, f"{player.name} has no seat"
+        return (game.point or 0, tuple(game.ledger.row(player.seat)),
+                round(player.wallet, WALLET_DIGITS),
+                tuple(sorted(player.strategy_state.items())))
+
+    def _load(self, state: State) -> None:
+        point, bets, wallet, strategy_state = state
+        self.game.point = point or None
+        self.game.phase = POINT if point else COME_OUT
+        self.game.ledger.restore(list(bets))
+        self.player.wallet = wallet
+        self.player.strategy_state = dict(strategy_state)
+
+    def _expand(self, state: State, queue: deque) -> None:
+        self._load(state)
+        self.game._performPlayerActions()
+        acted = self._read()
+        row: Dict[int, float] = {}
+        ruin = escape = 0.0
+        for dice, p in ROLL_ODDS.items():
+            self._load(acted)
+            self.game.d1, self.game.d2 = dice, 0
+            self.game._reconcile()
+            next_state = self._read()
+            wallet = next_state[2]
+            if wallet <= 0:
+                ruin += p
+            elif wallet >= self.max_wallet:
+                escape += p
+            else:
+                if next_state not in self.index:
+                    self.index[next_state] = len(self.index)
+                    queue.append(next_state)
+                j = self.index[next_state]
+                row[j] = row.get(j, 0.0) + p
+        self.rows.append(list(row.items()))
+        self.ruin.append(ruin)
+        self.escape.append(escape)
+
+    def transitions(self) -> "Transitions":
+        if self._transitions is None:
+            self._transitions = Transitions(self.rows)
+        return self._transitions
+
+    def solve(self, horizon: int = 0) -> Solution:
+        ones = [1.0] * len(self.rows)
+        lifetime, ruin, escape = _solve_absorbing(self.transitions(),
+                                                  [ones, self.ruin,
+                                                   self.escape])
+        return Solution(len(self.rows), float(lifetime[0]), float(ruin[0]),
+                        float(escape[0]), self.lifetime_pmf(horizon))
+
+    def lifetime_pmf(self, horizon: int) -> List[float]:
+        import numpy  # type: ignore
+        q = self.transitions()
+        ruin = numpy.array(self.ruin)
+        dist = numpy.zeros(q.n)
+        dist[0] = 1.0
+        pmf: List[float] = []
+        for _ in range(horizon):
+            pmf.append(float(dist @ ruin))
+            dist = q.rdot(dist)
+        return pmf
+
+
+class Transitions():
+    """The transient part Q of a chain as coordinate arrays, so products
+    with it need NumPy alone."""
+
+    def __init__(self, rows: List[List[Tuple[int, float]]]) -> None:
+        import numpy  # type: ignore
+        self.n = len(rows)
+        self.rows = numpy.fromiter(
+            (i for i, row in enumerate(rows) for _ in row), numpy.int64)
+        self.cols = numpy.fromiter((j for row in rows for j, _ in row),
+                                   numpy.int64)
+        self.probs = numpy.fromiter((p for row in rows for _, p in row),
+                                    numpy.float64)
+
+    def dot(self, x: Any) -> Any:
+        """Q x"""
+        import numpy  # type: ignore
+        return numpy.bincount(self.rows,
+                              weights=self.probs * x[self.cols],
+                              minlength=self.n)
+
+    def rdot(self, x: Any) -> Any:
+        """x Q"""
+        import numpy  # type: ignore
+        return numpy.bincount(self.cols,
+                              weights=x[self.rows] * self.probs,
+                              minlength=self.n)
+
+    def diagonal(self) -> Any:
+        import numpy  # type: ignore
+        on_diagonal = self.rows == self.cols
+        return numpy.bincount(self.rows[on_diagonal],
+                              weights=self.probs[on_diagonal],
+                              minlength=self.n)
+
+
+def _solve_absorbing(q: Transitions,
+                     bs: List[List[float]],
+                     tol: float = 1e-12) -> List[Any]:
+    """Solve (I - Q) x = b for every b in `bs`.
+
+    Factorizes once with SciPy's sparse LU when it is installed. Without
+    SciPy, chains of up to DENSE_STATES states are solved densely and
+    larger ones with Jacobi preconditioned BiCGSTAB on NumPy arrays.
+    """
+    import numpy  # type: ignore
+    try:
+        from scipy import sparse  # type: ignore
+        from scipy.sparse.linalg import splu  # type: ignore
+    except ImportError:
+        pass
+    else:
+        matrix = sparse.identity(q.n, format="csc") - sparse.csc_matrix(
+            (q.probs, (q.rows, q.cols)), shape=(q.n, q.n))
+        lu = splu(matrix)
+        return [lu.solve(numpy.array(b)) for b in bs]
+
+    if q.n <= DENSE_STATES:
+        matrix = numpy.identity(q.n)
+        numpy.subtract.at(matrix, (q.rows, q.cols), q.probs)
+        solution = numpy.linalg.solve(matrix, numpy.array(bs).T)
+        return list(solution.T)
+    return [_bicgstab(q, numpy.array(b), tol) for b in bs]
+
+
+def _bicgstab(q: Transitions, b: Any, tol: float,
+              max_iterations: int = 100000) -> Any:
+    import numpy  # type: ignore
+    scale = 1.0 / (1.0 - q.diagonal())
+    norm = numpy.linalg.norm(b)
+    x = b * scale
+    if norm == 0:
+        return x
+    r = b - (x - q.dot(x))
+    r0 = r.copy()
+    rho = alpha = omega = 1.0
+    v = p = numpy.zeros(q.n)
+    for _ in range(max_iterations):
+        rho, previous = r0 @ r, rho
+        p = r + (rho / previous) * (alpha / omega) * (p - omega * v)
+        p_hat = scale * p
+        v = p_hat - q.dot(p_hat)
+        alpha = rho / (r0 @ v)
+        s = r - alpha * v
+        s_hat = scale * s
+        t = s_hat - q.dot(s_hat)
+        omega = (t @ s) / (t @ t)
+        x = x + alpha * p_hat + omega * s_hat
+        r = s - omega * t
+        if numpy.linalg.norm(r) < tol * norm:
+            # The recurrence drifts from the true residual, check it
+            if numpy.linalg.norm(b - (x - q.dot(x))) < 10 * tol * norm:
+                return x
+            r = b - (x - q.dot(x))
+            r0 = r.copy()
+            rho = alpha = omega = 1.0
+            v = p = numpy.zeros(q.n)
+    raise ValueError("BiCGSTAB did not converge")
+
+
+def solve(strategy: Strategy,
+          min_bet: int,
+          wallet: float,
+          max_wallet: Optional[float] = None,
+          field_multiplier: int = 3,
+          horizon: int = 0,
+          max_odds: Optional[int] = None) -> Solution:
+    """Exact lifetime and ruin odds for `strategy` starting at `wallet`.
+
+    `max_wallet` defaults to twice the starting wallet. `horizon` is the
+    number of rolls of the lifetime distribution to compute.
+    """
+    if max_wallet is None:
+        max_wallet = 2 * wallet
+    chain = Chain(strategy, min_bet, wallet, max_wallet, field_multiplier,
+                  max_odds=max_odds)
+    return chain.solve(horizon)
@@ -1,4 +1,4 @@
-from typing import List, Any, Dict
+from typing import List, Any, Dict, Optional
 from craps.action import Action
 from craps.strategy import Strategy
 
@@ -8,11 +8,13 @@ class OutOfMoney(Exception):
 
 
 class Player():
-    def __init__(self, name: str, wallet: int, strategy: Strategy):
+    def __init__(self, name: str, wallet: float, strategy: Strategy):
         self.name = name
         self.wallet = wallet
         self.strategy = strategy
         self.strategy_state: Dict[str, Any] = dict()
+        # Row of this player in the table's Ledger, set by Craps.join
+        self.seat: Optional[int] = None
 
     def __str__(self) -> str:
         return f"{self.name} [{self.wallet}] playing {self.strategy}"
@@ -20,10 +22,10 @@ class Player():
     def next_actions(self, game) -> List[Action]:
         return self.strategy.next_actions(game, self)
 
-    def add(self, amount: int) -> None:
+    def add(self, amount: float) -> None:
         self.wallet += amount
 
-    def deduct(self, amount) -> int:
+    def deduct(self, amount) -> float:
         self.wallet -= amount
         # if self.wallet < 0:
         #     raise OutOfMoney()
@@ -1,5 +1,4 @@
-from typing import List
-from matplotlib import pyplot  # type: ignore
+from typing import List, Optional, Sequence, Tuple
 
 # fname = get_sample_data('percent_bachelors_degrees_women_usa.csv',
 #                         asfileobj=False)
@@ -7,11 +6,150 @@ from matplotlib import pyplot  # type: ignore
 
 
 COLORS = ['red', 'green', 'blue']
+PERCENTILES = (10, 50, 90)
+# Points drawn per trajectory at most, a few per pixel of a large figure
+MAX_POINTS = 2000
 
 
-def plot(craps_data: List[List[List[int]]]):
+def _pyplot(headless: bool):
+    # Imported here so simulations never pay for matplotlib. A file
+    # written from a batch node must not need a display.
+    import matplotlib  # type: ignore
+    if headless:
+        matplotlib.use("Agg")
+    from matplotlib import pyplot  # type: ignore
+    return pyplot
+
+
+def downsample_minmax(history: Sequence[float],
+                      max_points: int = MAX_POINTS):
+    """(x, y) keeping the lowest and highest value of each of
+    `max_points / 2` buckets, in the order they happened, so spikes and
+    ruin survive."""
+    import numpy  # type: ignore
+    y = numpy.asarray(history, dtype=float)
+    n = len(y)
+    buckets = max_points // 2
+    if n <= max_points or buckets < 1:
+        return numpy.arange(n), y
+    width = -(-n // buckets)
+    # Only the last bucket may be short, so no row is all padding
+    buckets = -(-n // width)
+    padded = numpy.full(buckets * width, numpy.nan)
+    padded[:n] = y
+    rows = padded.reshape(buckets, width)
+    lo = numpy.nanargmin(rows, axis=1)
+    hi = numpy.nanargmax(rows, axis=1)
+    starts = numpy.arange(buckets) * width
+    x = numpy.stack([starts + numpy.minimum(lo, hi),
+                     starts + numpy.maximum(lo, hi)], axis=1).ravel()
+    x = numpy.unique(x)
+    return x, y[x]
+
+
+def downsample_lttb(history: Sequence[float],
+                    max_points: int = MAX_POINTS):
+    """(x, y) picked by Largest-Triangle-Three-Buckets, which keeps the
+    visual shape of the line with `max_points` points."""
+    import numpy  # type: ignore
+    y = numpy.asarray(history, dtype=float)
+    n = len(y)
+    if n <= max_points or max_points < 3:
+        return numpy.arange(n), y
+    x = numpy.arange(n, dtype=float)
+    # First and last points are kept, the rest split into equal buckets
+    edges = numpy.linspace(1, n - 1, max_points - 1).astype(int)
+    picked = [0]
+    for b in range(max_points - 2):
+        start, end = edges[b], edges[b + 1]
+        if b + 2 < len(edges):
+            next_start, next_end = edges[b + 1], edges[b + 2]
+            avg_x = x[next_start:next_end].mean()
+            avg_y = y[next_start:next_end].mean()
+        else:
+            avg_x, avg_y = x[-1], y[-1]
+        ax, ay = x[picked[-1]], y[picked[-1]]
+        area = numpy.abs((ax - avg_x) * (y[start:end] - ay) -
+                         (ax - x[start:end]) * (avg_y - ay))
+        picked.append(start + int(area.argmax()))
+    picked.append(n - 1)
+    index = numpy.array(picked)
+    return index, y[index]
+
+
+def envelope(low: Sequence[float],
+             high: Sequence[float],
+             max_points: Optional[int] = MAX_POINTS):
+    """(x, low, high) with the lowest `low` and highest `high` of each of
+    `max_points` buckets, so a shaded band never looks narrower than it
+    is."""
+    import numpy  # type: ignore
+    lows = numpy.asarray(low, dtype=float)
+    highs = numpy.asarray(high, dtype=float)
+    n = len(lows)
+    if max_points is None or n <= max_points:
+        return numpy.arange(n), lows, highs
+    starts = numpy.linspace(0, n, max_points, endpoint=False).astype(int)
+    return (starts, numpy.minimum.reduceat(lows, starts),
+            numpy.maximum.reduceat(highs, starts))
+
+
+def percentile_bands(histories: Sequence[Sequence[float]],
+                     percentiles: Sequence[float] = PERCENTILES):
+    """One row per percentile of the wallet at each roll across trials.
+
+    Trials that ended early keep their final wallet for the later rolls.
+    """
+    import numpy  # type: ignore
+    length = max(len(h) for h in histories)
+    paths = numpy.empty((len(histories), length))
+    for i, history in enumerate(histories):
+        paths[i, :len(history)] = history
+        paths[i, len(history):] = history[-1] if len(history) else 0
+    return numpy.percentile(paths, percentiles, axis=0)
+
+
+def plot(craps_data: List[List[List[float]]],
+         path: Optional[str] = None,
+         bands: bool = False,
+         max_points: Optional[int] = MAX_POINTS,
+         labels: Optional[Sequence[str]] = None,
+         percentiles: Tuple[float, float, float] = PERCENTILES) -> None:
+    """Plot the wallet histories of each strategy.
+
+    Each history is downsampled to `max_points` (None draws every point).
+    With `bands` each strategy is drawn as its median and a shaded band
+    between the outer percentiles instead of one line per trial. With a
+    `path` the figure is written there, in the format of its extension
+    (.png, .svg, ...), without a display.
+    """
+    pyplot = _pyplot(headless=path is not None)
+    figure, axes = pyplot.subplots(figsize=(12, 6))
     for i, strategy in enumerate(craps_data):
-        for history in strategy:
-            # pyplot.plot(history, color=COLORS[i % len(COLORS)])
-            pyplot.plot(history)
-    pyplot.show()
+        label = labels[i] if labels is not None else None
+        if bands:
+            low, mid, high = percentile_bands(strategy, percentiles)
+            x, mid = _downsample(mid, max_points, downsample_lttb)
+            color = COLORS[i % len(COLORS)]
+            bx, low, high = envelope(low, high, max_points)
+            axes.fill_between(bx, low, high, color=color, alpha=0.2)
+            axes.plot(x, mid, color=color, label=label)
+        else:
+            for j, history in enumerate(strategy):
+                x, y = _downsample(history, max_points, downsample_minmax)
+                # pyplot.plot(history, color=COLORS[i % len(COLORS)])
+                axes.plot(x, y, label=label if j == 0 else None)
+    if labels is not None:
+        axes.legend()
+    if path is not None:
+        figure.savefig(path)
+        pyplot.close(figure)
+    else:
+        pyplot.show()
+
+
+def _downsample(history, max_points: Optional[int], method):
+    if max_points is None:
+        import numpy  # type: ignore
+        return numpy.arange(len(history)), history
+    return method(history, max_points)
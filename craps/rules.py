@@ -0,0 +1,149 @@
+from functools import lru_cache
+from typing import Dict, List, NamedTuple, Optional, Tuple
+from craps.constants import (POINT, COME_OUT, NUM_TO_FIELD, FIELD_IDS,
+                             POINT_NUMS)
+
+ODDS_PAYOUT = {
+    "FOUR_ODDS": 2,
+    "FIVE_ODDS": 3/2,
+    "SIX_ODDS": 6/5,
+    "EIGHT_ODDS": 6/5,
+    "NINE_ODDS": 3/2,
+    "TEN_ODDS": 2,
+}
+
+PLACE_PAYOUT = {
+    "FOUR_PLACE": 9/5,
+    "FIVE_PLACE": 7/5,
+    "SIX_PLACE": 7/6,
+    "EIGHT_PLACE": 7/6,
+    "NINE_PLACE": 7/5,
+    "TEN_PLACE": 9/5,
+}
+
+WIN = 0
+LOSE = 1
+MOVE = 2
+
+# Every bet lost on a seven out, in settlement order
+SEVEN_OUT_FIELDS = (["PASS_LINE", "PASS_ODDS"] +
+                    [f"{NUM_TO_FIELD[n]}_COME" for n in POINT_NUMS] +
+                    [f"{NUM_TO_FIELD[n]}_ODDS" for n in POINT_NUMS] +
+                    [f"{NUM_TO_FIELD[n]}_PLACE" for n in POINT_NUMS] +
+                    ["FIELD"])
+
+ESTABLISH_POINT = "ESTABLISH POINT"
+SEVEN_OUT = "SEVEN OUT"
+
+
+class Settlement(NamedTuple):
+    op: int
+    field_id: int
+    # Payout multiplier for WIN, target field id for MOVE
+    arg: float
+
+
+class Transition(NamedTuple):
+    settlements: Tuple[Settlement, ...]
+    phase: bool
+    point: Optional[int]
+    event: Optional[str]
+
+
+# RuleTable[point or 0][dice] -> Transition, None where the point or
+# dice total cannot happen
+RuleTable = Tuple[Tuple[Optional[Transition], ...], ...]
+
+
+def _win(field_name: str, multiplier: float) -> Settlement:
+    return Settlement(WIN, FIELD_IDS[field_name], multiplier)
+
+
+def _lose(field_name: str) -> Settlement:
+    return Settlement(LOSE, FIELD_IDS[field_name], 0)
+
+
+def _move(from_field: str, to_field: str) -> Settlement:
+    return Settlement(MOVE, FIELD_IDS[from_field], FIELD_IDS[to_field])
+
+
+def _field(dice: int, field_payout: Dict[int, float]) -> Settlement:
+    if dice in field_payout:
+        return _win("FIELD", field_payout[dice])
+    return _lose("FIELD")
+
+
+def _come_out(dice: int, field_payout: Dict[int, float]) -> Transition:
+    if dice in (2, 3, 12):
+        return Transition((_lose("PASS_LINE"), _field(dice, field_payout)),
+                          COME_OUT, None, None)
+    if dice in POINT_NUMS:
+        return Transition((_field(dice, field_payout), ), POINT, dice,
+                          ESTABLISH_POINT)
+    return Transition((_win("PASS_LINE", 1), _field(dice, field_payout)),
+                      COME_OUT, None, None)
+
+
+def _point(point: int, dice: int, field_payout: Dict[int, float],
+           odds_payout: Dict[str, float],
+           place_payout: Dict[str, float]) -> Transition:
+    if dice == 7:
+        seven_out = [_lose(name) for name in SEVEN_OUT_FIELDS]
+        return Transition(tuple([_win("COME", 1)] + seven_out), COME_OUT,
+                          None, SEVEN_OUT)
+    if dice == 11:
+        return Transition((_win("COME", 1), _field(dice, field_payout)),
+                          POINT, point, None)
+    if dice in (2, 3, 12):
+        return Transition((_lose("COME"), _field(dice, field_payout)), POINT,
+                          point, None)
+
+    settlements: List[Settlement] = []
+    phase = POINT
+    next_point: Optional[int] = point
+    if dice == point:
+        point_odds = f"{NUM_TO_FIELD[point]}_ODDS"
+        settlements.append(_win("PASS_LINE", 1))
+        settlements.append(_win("PASS_ODDS", odds_payout[point_odds]))
+        phase, next_point = COME_OUT, None
+    name = NUM_TO_FIELD[dice]
+    settlements += [
+        _field(dice, field_payout),
+        _win(f"{name}_PLACE", place_payout[f"{name}_PLACE"]),
+        _win(f"{name}_COME", 1),
+        _win(f"{name}_ODDS", odds_payout[f"{name}_ODDS"]),
+        _win(f"{name}_COME", 1),
+        _move("COME", f"{name}_COME"),
+    ]
+    return Transition(tuple(settlements), phase, next_point, None)
+
+
+def compile_rules(field_multiplier: int = 3,
+                  odds_payout: Dict[str, float] = ODDS_PAYOUT,
+                  place_payout: Dict[str, float] = PLACE_PAYOUT) -> RuleTable:
+    """Compile every (point, dice) outcome into its settlements.
+
+    The FIELD pays even money on 3, 4, 9, 10 and 11, double on 2 and
+    `field_multiplier` on 12.
+    """
+    field_payout: Dict[int, float] = {3: 1, 4: 1, 9: 1, 10: 1, 11: 1, 2: 2,
+                                      12: field_multiplier}
+    table: List[Tuple[Optional[Transition], ...]] = []
+    for point in range(11):
+        row: List[Optional[Transition]] = [None, None]
+        for dice in range(2, 13):
+            if point == 0:
+                row.append(_come_out(dice, field_payout))
+            elif point in POINT_NUMS:
+                row.append(
+                    _point(point, dice, field_payout, odds_payout,
+                           place_payout))
+            else:
+                row.append(None)
+        table.append(tuple(row))
+    return tuple(table)
+
+
+@lru_cache(maxsize=None)
+def default_rules(field_multiplier: int = 3) -> RuleTable:
+    return compile_rules(field_multiplier)
@@ -0,0 +1,217 @@
+import copy
+import os
+import random
+from typing import (Any, Callable, List, NamedTuple, Optional, Sequence,
+                    Tuple, TypeVar)
+from craps.dice import AntitheticDiceRng, make_rng
+from craps.game import Craps
+from craps.history import NoHistory, Recorder
+from craps.player import Player
+from craps.stats import Histogram, Summary
+from craps.stop import StopRule
+from craps.strategy import Strategy
+
+T = TypeVar("T")
+
+
+class TrialConfig(NamedTuple):
+    # A Strategy class or any picklable factory (e.g. functools.partial),
+    # called once per player per trial
+    strategy: Callable[[], Strategy]
+    min_bet: int = 10
+    wallet: int = 1000
+    # None plays until every player is out of money
+    max_iterations: Optional[int] = 100
+    num_players: int = 1
+    field_multiplier: int = 3
+    # Keep the total wallet after every roll
+    trajectories: bool = False
+    rng_backend: Optional[str] = None
+    # Ends each trial early, e.g. WinTarget(500) | LossLimit(500)
+    stop: Optional[StopRule] = None
+    # Odds multiple behind every point, None is 3-4-5x
+    max_odds: Optional[int] = None
+
+
+class TrialResult(NamedTuple):
+    end_wallet: float
+    lifetime: int
+    trajectory: Optional[List[float]]
+    # The players' money ran out after some roll, see Bankroll.ruined
+    ruined: bool = False
+
+
+class TrialResults(NamedTuple):
+    seed: int
+    end_wallets: List[float]
+    lifetimes: List[int]
+    trajectories: Optional[List[List[float]]]
+
+
+class TrialSummary():
+    """Streaming summaries of trial outcomes, mergeable across chunks."""
+
+    def __init__(self,
+                 seed: int,
+                 wallet_histogram: Optional[Histogram] = None) -> None:
+        self.seed = seed
+        # The histogram given is a template, counts go into a copy
+        self.end_wallets = Summary(
+            histogram=copy.deepcopy(wallet_histogram))
+        self.lifetimes = Summary()
+        # Trials where the players ran out of money
+        self.ruined = 0
+
+    @property
+    def num_trials(self) -> int:
+        return len(self.end_wallets)
+
+    def add(self, result: TrialResult) -> None:
+        self.end_wallets.add(result.end_wallet)
+        self.lifetimes.add(result.lifetime)
+        if result.ruined:
+            self.ruined += 1
+
+    def merge(self, other: "TrialSummary") -> None:
+        self.end_wallets.merge(other.end_wallets)
+        self.lifetimes.merge(other.lifetimes)
+        self.ruined += other.ruined
+
+
+def build_game(config: TrialConfig,
+               seed: Any,
+               trial: int,
+               antithetic: bool = False) -> Craps:
+    """A fresh table for `trial`, dice seeded from (seed, trial).
+
+    With `antithetic` the table rolls the mirror image of those dice.
+    """
+    history = Recorder() if config.trajectories else NoHistory()
+    rng = make_rng(seed, (trial, ), config.rng_backend)
+    if antithetic:
+        rng = AntitheticDiceRng(rng)
+    game = Craps(config.min_bet,
+                 field_multiplier=config.field_multiplier,
+                 rng=rng,
+                 history=history,
+                 max_odds=config.max_odds)
+    for i in range(config.num_players):
+        game.join(
+            Player(name=f"Player {i + 1}",
+                   wallet=config.wallet,
+                   strategy=config.strategy()))
+    return game
+
+
+def run_trial(config: TrialConfig,
+              seed: Any,
+              trial: int,
+              antithetic: bool = False) -> TrialResult:
+    game = build_game(config, seed, trial, antithetic)
+    game.start(max_iterations=config.max_iterations, stop=config.stop)
+    trajectory = None
+    if config.trajectories:
+        trajectory = list(game.game_history.wallet)
+    return TrialResult(game.total_player_money(), game.iteration, trajectory,
+                       game.bankroll.ruined)
+
+
+def _run_chunk(args) -> List[TrialResult]:
+    config, seed, trials = args
+    return [run_trial(config, seed, trial) for trial in trials]
+
+
+def _summarize_chunk(args) -> TrialSummary:
+    config, seed, trials, wallet_histogram = args
+    summary = TrialSummary(seed, wallet_histogram)
+    for trial in trials:
+        summary.add(run_trial(config, seed, trial))
+    return summary
+
+
+def _chunks(first_trial: int, num_trials: int,
+            chunksize: int) -> List[Sequence[int]]:
+    end = first_trial + num_trials
+    return [
+        range(start, min(start + chunksize, end))
+        for start in range(first_trial, end, chunksize)
+    ]
+
+
+def plan_chunks(num_trials: int,
+                processes: Optional[int] = None,
+                chunksize: Optional[int] = None,
+                first_trial: int = 0) -> Tuple[int, List[Sequence[int]]]:
+    """The number of processes to use and the trial ranges to hand out."""
+    if processes is None:
+        processes = os.cpu_count() or 1
+    processes = max(1, min(processes, num_trials))
+    if chunksize is None:
+        chunksize = max(1, num_trials // (processes * 4))
+    return processes, _chunks(first_trial, num_trials, chunksize)
+
+
+def map_chunks(func: Callable[[Any], T], jobs: Sequence[Any],
+               processes: int) -> List[T]:
+    """`[func(job) for job in jobs]`, on a process pool when processes > 1.
+    `func` and the jobs must be picklable."""
+    if processes == 1:
+        return [func(job) for job in jobs]
+    # Single process runs, the common case in short-lived workers, never
+    # import multiprocessing
+    from multiprocessing import Pool
+    with Pool(processes) as pool:
+        return pool.map(func, jobs)
+
+
+def run_trials(config: TrialConfig,
+               num_trials: int,
+               seed: Optional[int] = None,
+               processes: Optional[int] = None,
+               chunksize: Optional[int] = None,
+               first_trial: int = 0) -> TrialResults:
+    """Play `num_trials` independent tables, in parallel when processes > 1.
+
+    Trial `i` always rolls the dice stream derived from `(seed, i)`, so
+    results do not depend on the number of processes or the chunk size.
+    Trials are numbered from `first_trial`, so later batches can extend a
+    run. Without a seed a random one is drawn and returned in the results.
+    """
+    if seed is None:
+        seed = random.SystemRandom().getrandbits(63)
+    processes, chunks = plan_chunks(num_trials, processes, chunksize,
+                                    first_trial)
+    jobs = [(config, seed, trials) for trials in chunks]
+    results = [
+        result for chunk in map_chunks(_run_chunk, jobs, processes)
+        for result in chunk
+    ]
+    trajectories: Optional[List[List[float]]] = None
+    if config.trajectories:
+        trajectories = [r.trajectory or [] for r in results]
+    return TrialResults(seed, [r.end_wallet for r in results],
+                        [r.lifetime for r in results], trajectories)
+
+
+def summarize_trials(config: TrialConfig,
+                     num_trials: int,
+                     seed: Optional[int] = None,
+                     processes: Optional[int] = None,
+                     chunksize: Optional[int] = None,
+                     first_trial: int = 0,
+                     wallet_histogram: Optional[Histogram] = None
+                     ) -> TrialSummary:
+    """Like `run_trials`, but each chunk returns streaming summaries
+    instead of every result, so memory does not grow with `num_trials`.
+
+    `wallet_histogram` is an empty Histogram to count end wallets into.
+    """
+    if seed is None:
+        seed = random.SystemRandom().getrandbits(63)
+    processes, chunks = plan_chunks(num_trials, processes, chunksize,
+                                    first_trial)
+    jobs = [(config, seed, trials, wallet_histogram) for trials in chunks]
+    summary = TrialSummary(seed, wallet_histogram)
+    for chunk in map_chunks(_summarize_chunk, jobs, processes):
+        summary.merge(chunk)
+    return summary
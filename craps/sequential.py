@@ -0,0 +1,104 @@
+import math
+import random
+import time
+from typing import Dict, List, NamedTuple, Optional, Sequence
+from craps.runner import TrialConfig, TrialSummary, summarize_trials
+from craps.stats import Histogram, Interval, proportion_interval
+
+END_WALLET = "end_wallet"
+LIFETIME = "lifetime"
+# Probability that the players end with no money
+RUIN = "ruin"
+METRICS = (END_WALLET, LIFETIME, RUIN)
+
+
+class Target(NamedTuple):
+    metric: str
+    # Widest acceptable confidence interval, high - low
+    width: float
+    confidence: float = 0.95
+
+
+class SequentialResult(NamedTuple):
+    seed: int
+    num_trials: int
+    num_batches: int
+    seconds: float
+    # False when the trial or time budget ran out before every target
+    # was met
+    converged: bool
+    intervals: Dict[str, Interval]
+    summary: TrialSummary
+
+
+def estimate(summary: TrialSummary,
+             metric: str,
+             confidence: float = 0.95) -> Interval:
+    if metric == END_WALLET:
+        return summary.end_wallets.stats.interval(confidence)
+    if metric == LIFETIME:
+        return summary.lifetimes.stats.interval(confidence)
+    if metric == RUIN:
+        return proportion_interval(summary.ruined, summary.num_trials,
+                                   confidence)
+    raise ValueError(f"Unknown metric {metric}, expected one of {METRICS}")
+
+
+def run_until(config: TrialConfig,
+              targets: Sequence[Target],
+              batch_size: int = 100,
+              max_trials: int = 100000,
+              max_seconds: Optional[float] = None,
+              seed: Optional[int] = None,
+              processes: Optional[int] = None,
+              wallet_histogram: Optional[Histogram] = None
+              ) -> SequentialResult:
+    """Add batches of trials until every target's interval is narrow enough.
+
+    After each batch the number of trials still needed is estimated from
+    how fast the intervals are shrinking, so the next batch is sized to
+    finish in one more step where possible, at least `batch_size` and at
+    most doubling the trials so far. Budgets are checked between batches.
+    Trials continue the same numbering, so the result equals a single
+    `summarize_trials` call with the same seed and trial count.
+    """
+    for target in targets:
+        if target.metric not in METRICS:
+            raise ValueError(f"Unknown metric {target.metric}, "
+                             f"expected one of {METRICS}")
+    if seed is None:
+        seed = random.SystemRandom().getrandbits(63)
+    started = time.monotonic()
+    summary = TrialSummary(seed, wallet_histogram)
+    num_batches = 0
+    next_batch = batch_size
+    while True:
+        summary.merge(
+            summarize_trials(config,
+                             next_batch,
+                             seed,
+                             processes,
+                             first_trial=summary.num_trials,
+                             wallet_histogram=wallet_histogram))
+        num_batches += 1
+        n = summary.num_trials
+        intervals = {
+            target.metric: estimate(summary, target.metric,
+                                    target.confidence)
+            for target in targets
+        }
+        needed: List[float] = []
+        for target in targets:
+            width = intervals[target.metric].high - intervals[
+                target.metric].low
+            if not width <= target.width:
+                needed.append(n * (width / target.width)**2
+                              if math.isfinite(width) else 2 * n)
+        seconds = time.monotonic() - started
+        converged = not needed
+        if (converged or n >= max_trials
+                or (max_seconds is not None and seconds >= max_seconds)):
+            return SequentialResult(seed, n, num_batches, seconds, converged,
+                                    intervals, summary)
+        more = math.ceil(max(needed) * 1.1) - n
+        next_batch = min(max(more, batch_size), n, max_trials - n)
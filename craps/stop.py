@@ -0,0 +1,152 @@
+import time
+from typing import Sequence
+
+
+class StopRule():
+    """Decides before each roll whether `Craps.start` should stop.
+
+    Rules read the table's running `Bankroll` aggregates, so checking them
+    costs the same at any number of players. Combine rules with `|` (stop
+    when any holds) and `&` (stop when all hold).
+    """
+    # False when the same dice can stop at different rolls, see
+    # craps.cache
+    reproducible = True
+
+    def reset(self, game) -> None:
+        """Called when `start` begins."""
+        pass
+
+    def __call__(self, game) -> bool:
+        raise NotImplementedError()
+
+    def __or__(self, other: "StopRule") -> "StopRule":
+        return AnyOf((self, other))
+
+    def __and__(self, other: "StopRule") -> "StopRule":
+        return AllOf((self, other))
+
+
+class AnyOf(StopRule):
+    def __init__(self, rules: Sequence[StopRule]) -> None:
+        self.rules = tuple(rules)
+
+    def reset(self, game) -> None:
+        for rule in self.rules:
+            rule.reset(game)
+
+    def __call__(self, game) -> bool:
+        for rule in self.rules:
+            if rule(game):
+                return True
+        return False
+
+    def __str__(self) -> str:
+        return " | ".join(str(rule) for rule in self.rules)
+
+
+class AllOf(AnyOf):
+    def __call__(self, game) -> bool:
+        for rule in self.rules:
+            if not rule(game):
+                return False
+        return True
+
+    def __str__(self) -> str:
+        return " & ".join(str(rule) for rule in self.rules)
+
+
+class WinTarget(StopRule):
+    """The table is up `amount` on the players' starting wallets."""
+
+    def __init__(self, amount: float) -> None:
+        self.amount = amount
+
+    def __call__(self, game) -> bool:
+        bankroll = game.bankroll
+        return bankroll.total - bankroll.start_total >= self.amount
+
+    def __str__(self) -> str:
+        return f"WinTarget({self.amount})"
+
+
+class LossLimit(StopRule):
+    """The table is down `amount` on the players' starting wallets."""
+
+    def __init__(self, amount: float) -> None:
+        self.amount = amount
+
+    def __call__(self, game) -> bool:
+        bankroll = game.bankroll
+        return bankroll.start_total - bankroll.total >= self.amount
+
+    def __str__(self) -> str:
+        return f"LossLimit({self.amount})"
+
+
+class MaxDrawdown(StopRule):
+    """The total wallet has fallen `amount` from its peak."""
+
+    def __init__(self, amount: float) -> None:
+        self.amount = amount
+
+    def __call__(self, game) -> bool:
+        return game.bankroll.drawdown_total() >= self.amount
+
+    def __str__(self) -> str:
+        return f"MaxDrawdown({self.amount})"
+
+
+class PlayerBust(StopRule):
+    """Any player, or with `every=True` every player, is out of money."""
+
+    def __init__(self, every: bool = False) -> None:
+        self.every = every
+
+    def __call__(self, game) -> bool:
+        broke = len(game.bankroll.broke)
+        if self.every:
+            return broke == len(game.players)
+        return broke > 0
+
+    def __str__(self) -> str:
+        return f"PlayerBust(every={self.every})"
+
+
+class RollBudget(StopRule):
+    """`rolls` rolls have been played since `start` began."""
+
+    def __init__(self, rolls: int) -> None:
+        self.rolls = rolls
+        self._stop_at = rolls
+
+    def reset(self, game) -> None:
+        self._stop_at = game.iteration + self.rolls
+
+    def __call__(self, game) -> bool:
+        return game.iteration >= self._stop_at
+
+    def __str__(self) -> str:
+        return f"RollBudget({self.rolls})"
+
+
+class WallClock(StopRule):
+    """`seconds` have passed since `start` began, checked every `every`
+    rolls."""
+    reproducible = False
+
+    def __init__(self, seconds: float, every: int = 256) -> None:
+        self.seconds = seconds
+        self.every = every
+        self._deadline = 0.0
+
+    def reset(self, game) -> None:
+        self._deadline = time.monotonic() + self.seconds
+
+    def __call__(self, game) -> bool:
+        if game.iteration % self.every:
+            return False
+        return time.monotonic() >= self._deadline
+
+    def __str__(self) -> str:
+        return f"WallClock({self.seconds})"
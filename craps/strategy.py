@@ -1,12 +1,24 @@
-from typing import List
-from craps.action import Action, Bet, DoNothing
-from craps.constants import POINT, COME_OUT, NUM_TO_FIELD
+import copy
+from collections import OrderedDict
+from typing import Hashable, List, Optional
+from craps.action import Action, ActionBuffer, Bet, DO_NOTHING
+from craps.constants import POINT, COME_OUT
 
 
 class Strategy():
+    # True when next_actions depends only on the phase, the point, which
+    # fields the player has money on and the wallet, see CachedStrategy
+    deterministic = False
+    # True when the strategy implements write_actions, which appends
+    # opcodes to the table's ActionBuffer instead of returning Actions
+    buffered = False
+
     def next_actions(self, game, player) -> List[Action]:
         pass
 
+    def write_actions(self, game, player, buffer: ActionBuffer) -> None:
+        pass
+
     def init_strategy(self, game, player) -> None:
         pass
 
@@ -15,6 +27,8 @@ class Strategy():
 
 
 class PassBet(Strategy):
+    deterministic = True
+
     def _num_come_bets(self, game, player) -> int:
         return sum([f.get(player) > 0 for f in game.point_num_fields()])
 
@@ -22,11 +36,16 @@ class PassBet(Strategy):
         if game.phase is COME_OUT and game.is_empty("PASS_LINE", player):
             return [Bet("PASS_LINE", game.MIN_BET)]
         elif game.phase is POINT:
-            return [DoNothing()]
-        return [DoNothing()]
+            return [DO_NOTHING]
+        return [DO_NOTHING]
 
 
 class PassComeBet(Strategy):
+    deterministic = True
+
+    def __init__(self, max_come_bets: int = 2) -> None:
+        self.max_come_bets = max_come_bets
+
     def _num_come_bets(self, game, player) -> int:
         return sum([f.get(player) > 0 for f in game.point_num_fields()])
 
@@ -34,13 +53,18 @@ class PassComeBet(Strategy):
         if game.phase is COME_OUT and game.is_empty("PASS_LINE", player):
             return [Bet("PASS_LINE", game.MIN_BET)]
         elif game.phase is POINT:
-            if game.is_empty("COME",
-                             player) and self._num_come_bets(game, player) < 2:
+            if (game.is_empty("COME", player) and self._num_come_bets(
+                    game, player) < self.max_come_bets):
                 return [Bet("COME", game.MIN_BET)]
-        return [DoNothing()]
+        return [DO_NOTHING]
 
 
 class ThreePointMolly(Strategy):
+    deterministic = True
+
+    def __init__(self, max_come_bets: int = 2) -> None:
+        self.max_come_bets = max_come_bets
+
     def _num_come_bets(self, game, player) -> int:
         return sum([f.get(player) > 0 for f in game.point_num_fields()])
 
@@ -62,8 +86,7 @@ class ThreePointMolly(Strategy):
         actions: List[Action] = []
         if game.fields["PASS_ODDS"].get(player) > 0:
             return actions
-        point_field_name = NUM_TO_FIELD[game.point]
-        multiplier = game.fields[f"{point_field_name}_ODDS"].max_odds
+        multiplier = game.odds_fields[game.point].max_odds
         return [Bet("PASS_ODDS", game.MIN_BET * multiplier)]
 
     def next_actions(self, game, player) -> List[Action]:
@@ -76,50 +99,54 @@ class ThreePointMolly(Strategy):
         elif game.phase is POINT:
             actions += self._bet_pass_odds(game, player)
             actions += self._bet_come_odds(game, player)
-            if game.is_empty("COME",
-                             player) and self._num_come_bets(game, player) < 2:
+            if (game.is_empty("COME", player) and self._num_come_bets(
+                    game, player) < self.max_come_bets):
                 actions.append(Bet("COME", game.MIN_BET))
             return actions
-        return [DoNothing()]
+        return [DO_NOTHING]
 
 
 class PlaceNumbers(Strategy):
+    deterministic = True
+
     def next_actions(self, game, player) -> List[Action]:
         if game.phase is COME_OUT and game.is_empty("PASS_LINE", player):
             return [Bet("PASS_LINE", game.MIN_BET)]
         elif game.phase is POINT:
             bets: List[Action] = []
+            no_bet = game.place_fields[game.point]
             for field in game.place_num_fields():
-                no_bet = f"{NUM_TO_FIELD[game.point]}_PLACE"
-                if game.is_empty(field.name, player) and field.name != no_bet:
+                if field.get(player) == 0 and field is not no_bet:
                     bets.append(Bet(field.name, game.place_bets(field)))
                 else:
                     continue
             if game.is_empty("FIELD", player):
                 bets.append(Bet("FIELD", game.MIN_BET))
             return bets
-        return [DoNothing()]
+        return [DO_NOTHING]
 
 
 class FieldBetOnly(Strategy):
+    deterministic = True
+
     def next_actions(self, game, player) -> List[Action]:
         if game.is_empty("FIELD", player):
             return [Bet("FIELD", game.MIN_BET)]
-        return [DoNothing()]
+        return [DO_NOTHING]
 
 
 class IronCross(Strategy):
+    deterministic = True
+
     def init_strategy(self, game, player):
         self.player = player
         self.game = game
 
     def _bet(self, field_num: int) -> Action:
-        field_name = f"{NUM_TO_FIELD[field_num]}_PLACE"
-        point_field_name = f"{NUM_TO_FIELD[self.game.point]}_PLACE"
-        if self.game.is_empty(field_name,
-                              self.player) and point_field_name != field_name:
-            return Bet(field_name, self.game.place_bets(field_name))
-        return DoNothing()
+        field = self.game.place_fields[field_num]
+        if field.get(self.player) == 0 and self.game.point != field_num:
+            return Bet(field.name, self.game.place_bets(field))
+        return DO_NOTHING
 
     def next_actions(self, game, player) -> List[Action]:
         bets: List[Action] = []
@@ -135,7 +162,7 @@ class IronCross(Strategy):
             if game.is_empty("FIELD", player):
                 bets.append(Bet("FIELD", game.MIN_BET))
             return bets
-        return [DoNothing()]
+        return [DO_NOTHING]
 
 
 class ColorUp(Strategy):
@@ -145,18 +172,15 @@ class ColorUp(Strategy):
         self.player.strategy_state['bet_field'] = False
 
     def _bet(self, field_num: int) -> Action:
-        field_name = f"{NUM_TO_FIELD[field_num]}_PLACE"
-        point_field_name = f"{NUM_TO_FIELD[self.game.point]}_PLACE"
-        if self.game.is_empty(field_name,
-                              self.player) and point_field_name != field_name:
-            return Bet(field_name, self.game.place_bets(field_name))
-        return DoNothing()
+        field = self.game.place_fields[field_num]
+        if field.get(self.player) == 0 and self.game.point != field_num:
+            return Bet(field.name, self.game.place_bets(field))
+        return DO_NOTHING
 
     def _is_empty(self, field_nums: List[int]) -> bool:
-        point_field_name = f"{NUM_TO_FIELD[self.game.point]}_PLACE"
+        place_fields = self.game.place_fields
         return all([
-            (self.game.is_empty(f"{NUM_TO_FIELD[n]}_PLACE", self.player)
-             or f"{NUM_TO_FIELD[n]}_PLACE" == point_field_name)
+            (place_fields[n].get(self.player) == 0 or n == self.game.point)
             for n in field_nums
         ])
 
@@ -184,4 +208,58 @@ class ColorUp(Strategy):
             else:
                 bets.append(self._bet(4))
             return bets
-        return [DoNothing()]
+        return [DO_NOTHING]
+
+
+class CachedStrategy(Strategy):
+    """Memoizes a deterministic strategy's decisions.
+
+    Decisions are keyed by (point, bitmask of occupied fields) plus the
+    wallet divided into `bankroll_bucket` sized buckets when given. The
+    least recently used of more than `max_size` decisions is dropped.
+    Cached action lists are shared and must not be modified.
+    """
+
+    def __init__(self,
+                 strategy: Strategy,
+                 max_size: int = 4096,
+                 bankroll_bucket: Optional[float] = None) -> None:
+        if not strategy.deterministic:
+            raise ValueError(f"{strategy} is not deterministic")
+        self.strategy = strategy
+        self.max_size = max_size
+        self.bankroll_bucket = bankroll_bucket
+        self.cache: "OrderedDict[Hashable, List[Action]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self._game = None
+
+    def init_strategy(self, game, player) -> None:
+        if game is not self._game:
+            self.cache = OrderedDict()
+            self._game = game
+        self.strategy.init_strategy(game, player)
+
+    def __copy__(self) -> "CachedStrategy":
+        return CachedStrategy(copy.copy(self.strategy), self.max_size,
+                              self.bankroll_bucket)
+
+    def next_actions(self, game, player) -> List[Action]:
+        assert player.seat is not None, f"{player.name} has no seat"
+        key: Hashable = (game.point, game.ledger.occupied(player.seat))
+        if self.bankroll_bucket is not None:
+            key = (key, player.wallet // self.bankroll_bucket)
+        actions = self.cache.get(key)
+        if actions is not None:
+            self.hits += 1
+            self.cache.move_to_end(key)
+            return actions
+        self.misses += 1
+        actions = self.strategy.next_actions(game, player)
+        self.cache[key] = actions
+        if len(self.cache) > self.max_size:
+            self.cache.popitem(last=False)
+        return actions
+
+    def __str__(self) -> str:
+        return f"Cached{self.strategy}"
@@ -0,0 +1,236 @@
+import csv
+import functools
+import itertools
+import json
+import os
+import time
+from typing import (Any, Dict, Iterable, Iterator, List, NamedTuple, Optional,
+                    Sequence)
+from craps.cache import cache_key
+from craps.runner import TrialConfig, summarize_trials
+
+METRICS = ("mean_end_wallet", "stdev_end_wallet", "low_end_wallet",
+           "high_end_wallet", "p10_end_wallet", "p50_end_wallet",
+           "p90_end_wallet", "mean_lifetime", "ruin", "seconds")
+# Rolls per trial assumed when playing until broke, only used to order
+# jobs
+UNTIL_BROKE_ROLLS_PER_BET = 100
+
+
+class Job(NamedTuple):
+    # Content address of the run, see craps.cache.cache_key
+    key: str
+    config: TrialConfig
+    num_trials: int
+    seed: int
+
+    def cost(self) -> float:
+        """Rough number of player rolls the job will play."""
+        rolls: float
+        if self.config.max_iterations is not None:
+            rolls = self.config.max_iterations
+        else:
+            rolls = (self.config.wallet / self.config.min_bet *
+                     UNTIL_BROKE_ROLLS_PER_BET)
+        return self.num_trials * self.config.num_players * (rolls + 1)
+
+
+class Table():
+    """One row per swept cell, its parameters then its metrics."""
+
+    def __init__(self, columns: Sequence[str],
+                 rows: Sequence[Dict[str, Any]]) -> None:
+        self.columns = list(columns)
+        self.rows = list(rows)
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        return iter(self.rows)
+
+    def column(self, name: str) -> List[Any]:
+        return [row.get(name) for row in self.rows]
+
+    def write_csv(self, path: str) -> None:
+        with open(path, "w", newline="") as f:
+            writer = csv.DictWriter(f, self.columns)
+            writer.writeheader()
+            writer.writerows(self.rows)
+
+
+def grid(**axes: Sequence[Any]) -> List[Dict[str, Any]]:
+    """Every combination of the given values, one dict per cell.
+
+    `grid(strategy=[PassComeBet, ThreePointMolly], max_come_bets=[1, 2, 3],
+    max_odds=[None, 10])` is 12 cells. Add lists of cells to sweep
+    several grids at once.
+    """
+    names = list(axes)
+    return [
+        dict(zip(names, values))
+        for values in itertools.product(*(axes[name] for name in names))
+    ]
+
+
+def cell_config(cell: Dict[str, Any], base: TrialConfig) -> TrialConfig:
+    """`base` with the cell's TrialConfig fields replaced. Any other keys
+    are keyword arguments for the strategy."""
+    fields = {k: v for k, v in cell.items() if k in TrialConfig._fields}
+    params = {k: v for k, v in cell.items() if k not in TrialConfig._fields}
+    config = base._replace(**fields)
+    if params:
+        config = config._replace(
+            strategy=functools.partial(config.strategy, **params))
+    return config
+
+
+def expand(cells: Sequence[Dict[str, Any]],
+           num_trials: int,
+           seed: int,
+           base: Optional[TrialConfig] = None) -> List[Job]:
+    """The distinct jobs needed for `cells`, largest first.
+
+    Cells that describe the same run, such as `max_odds=None` and the
+    base's default, become one job. Each strategy is built once here so
+    a bad parameter fails before anything is played.
+    """
+    if base is None:
+        base = TrialConfig(cells[0]["strategy"])
+    jobs: Dict[str, Job] = {}
+    for cell in cells:
+        config = cell_config(cell, base)
+        key = cache_key(config, num_trials, seed)
+        if key not in jobs:
+            config.strategy()
+            jobs[key] = Job(key, config, num_trials, seed)
+    return sorted(jobs.values(), key=Job.cost, reverse=True)
+
+
+def label(value: Any) -> Any:
+    """A value as it should appear in a results table."""
+    if value is None or isinstance(value, (bool, int, float, str)):
+        return value
+    if isinstance(value, functools.partial):
+        args = [repr(a) for a in value.args]
+        args += [f"{k}={v!r}" for k, v in value.keywords.items()]
+        return f"{label(value.func)}({', '.join(args)})"
+    if isinstance(value, type):
+        return value.__name__
+    return str(value)
+
+
+def _run_job(job: Job) -> Dict[str, Any]:
+    started = time.monotonic()
+    summary = summarize_trials(job.config, job.num_trials, job.seed, 1)
+    wallets = summary.end_wallets
+    interval = wallets.stats.interval()
+    return {
+        "key": job.key,
+        "mean_end_wallet": wallets.stats.mean,
+        "stdev_end_wallet": wallets.stats.stdev,
+        "low_end_wallet": interval.low,
+        "high_end_wallet": interval.high,
+        "p10_end_wallet": wallets.quantile(0.1),
+        "p50_end_wallet": wallets.quantile(0.5),
+        "p90_end_wallet": wallets.quantile(0.9),
+        "mean_lifetime": summary.lifetimes.stats.mean,
+        "ruin": summary.ruined / summary.num_trials,
+        "seconds": time.monotonic() - started
+    }
+
+
+def load_checkpoint(path: str) -> Dict[str, Dict[str, Any]]:
+    """Finished jobs' metrics by key. A line cut short by a crash is
+    ignored and its job runs again."""
+    done: Dict[str, Dict[str, Any]] = {}
+    if not os.path.exists(path):
+        return done
+    with open(path) as f:
+        for line in f:
+            try:
+                metrics = json.loads(line)
+            except ValueError:
+                continue
+            done[metrics["key"]] = metrics
+    return done
+
+
+def _ends_with_newline(path: str) -> bool:
+    with open(path, "rb") as f:
+        f.seek(-1, os.SEEK_END)
+        return f.read(1) == b"\n"
+
+
+def sweep(cells: Sequence[Dict[str, Any]],
+          num_trials: int,
+          seed: int = 0,
+          base: Optional[TrialConfig] = None,
+          processes: Optional[int] = None,
+          checkpoint: Optional[str] = None,
+          progress=None) -> Table:
+    """Play every cell, a dict of TrialConfig fields and strategy keyword
+    arguments over `base`, for `num_trials` trials each.
+
+    Every cell rolls the same dice streams from `seed`, so cells are
+    compared on common random numbers. Identical jobs run once, and jobs
+    are handed to `processes` workers largest first so a big one does not
+    start last. With a `checkpoint` path each finished job is appended
+    there as a JSON line, and jobs already in the file are not run again,
+    so rerunning an interrupted sweep resumes it. `progress` is called
+    with (done, total) after each job.
+    """
+    if base is None:
+        base = TrialConfig(cells[0]["strategy"])
+    jobs = expand(cells, num_trials, seed, base)
+    done = load_checkpoint(checkpoint) if checkpoint is not None else {}
+    todo = [job for job in jobs if job.key not in done]
+    if processes is None:
+        processes = os.cpu_count() or 1
+    processes = max(1, min(processes, len(todo)))
+
+    out = None
+    if checkpoint is not None:
+        out = open(checkpoint, "a")
+        if out.tell() > 0 and not _ends_with_newline(checkpoint):
+            # Finish the line a crash cut short so the next one parses
+            out.write("\n")
+    finished = len(jobs) - len(todo)
+    pool = None
+    try:
+        results: Iterable[Dict[str, Any]]
+        if processes == 1:
+            results = map(_run_job, todo)
+        else:
+            from multiprocessing import Pool
+            pool = Pool(processes)
+            results = pool.imap_unordered(_run_job, todo)
+        for metrics in results:
+            done[metrics["key"]] = metrics
+            if out is not None:
+                out.write(json.dumps(metrics) + "\n")
+                out.flush()
+            finished += 1
+            if progress is not None:
+                progress(finished, len(jobs))
+        if pool is not None:
+            pool.close()
+            pool.join()
+            pool = None
+    finally:
+        if out is not None:
+            out.close()
+        # Only left set when a job or the pool itself failed
+        if pool is not None:
+            pool.terminate()
+
+    params: List[str] = []
+    for cell in cells:
+        params += [name for name in cell if name not in params]
+    rows = []
+    for cell in cells:
+        key = cache_key(cell_config(cell, base), num_trials, seed)
+        row = {name: label(cell.get(name)) for name in params}
+        row.update((name, done[key][name]) for name in METRICS)
+        rows.append(row)
+    return Table(params + list(METRICS), rows)
@@ -0,0 +1,134 @@
+import math
+import os
+import random
+from typing import Any, Dict, List, NamedTuple, Optional, Sequence, Tuple
+from craps.runner import TrialConfig, map_chunks, plan_chunks, run_trial
+from craps.sequential import END_WALLET, LIFETIME
+from craps.stats import Interval, mean_interval
+from craps.sweep import cell_config, label
+
+
+class Standing(NamedTuple):
+    name: str
+    cell: Dict[str, Any]
+    # Mean of the metric over the candidate's trials
+    interval: Interval
+    trials: int
+    # Table rolls played for this candidate
+    rolls: int
+    # The round the candidate was dropped in, None for survivors
+    eliminated: Optional[int]
+
+
+class TournamentResult(NamedTuple):
+    seed: int
+    metric: str
+    rounds: int
+    # Survivors best first, then the rest by how long they lasted
+    standings: List[Standing]
+
+    @property
+    def winner(self) -> Standing:
+        return self.standings[0]
+
+    @property
+    def rolls(self) -> int:
+        return sum(s.rolls for s in self.standings)
+
+
+def _play(args) -> Tuple[int, List[Tuple[float, int]]]:
+    candidate, config, seed, trials = args
+    results = [run_trial(config, seed, trial) for trial in trials]
+    return candidate, [(r.end_wallet, r.lifetime) for r in results]
+
+
+def _name(cell: Dict[str, Any]) -> str:
+    return ", ".join(f"{k}={label(v)}" for k, v in cell.items())
+
+
+def tournament(cells: Sequence[Dict[str, Any]],
+               base: Optional[TrialConfig] = None,
+               initial_trials: int = 100,
+               eta: int = 2,
+               max_trials: int = 10000,
+               keep: int = 1,
+               metric: str = END_WALLET,
+               confidence: float = 0.95,
+               halving: bool = True,
+               seed: Optional[int] = None,
+               processes: Optional[int] = None) -> TournamentResult:
+    """Race candidates, cells as in `craps.sweep`, giving each round's
+    survivors `eta` times more trials.
+
+    Every candidate plays trial `i` on the dice from `(seed, i)`, so after
+    each round a candidate is dropped when the confidence interval of its
+    paired difference from the leader lies entirely below zero. With
+    `halving`, only the best `1 / eta` of the rest carry on
+    (successive halving). The race ends when `keep` candidates remain or
+    survivors reach `max_trials`.
+    """
+    if metric not in (END_WALLET, LIFETIME):
+        raise ValueError(f"Unknown metric {metric}, expected {END_WALLET} "
+                         f"or {LIFETIME}")
+    if base is None:
+        base = TrialConfig(cells[0]["strategy"])
+    if seed is None:
+        seed = random.SystemRandom().getrandbits(63)
+    if processes is None:
+        processes = os.cpu_count() or 1
+    configs = [cell_config(cell, base) for cell in cells]
+    values: List[List[float]] = [[] for _ in cells]
+    rolls = [0] * len(cells)
+    eliminated: Dict[int, int] = {}
+    alive = list(range(len(cells)))
+    target = min(initial_trials, max_trials)
+    rounds = 0
+    while True:
+        rounds += 1
+        jobs = []
+        for c in alive:
+            done = len(values[c])
+            _, chunks = plan_chunks(target - done, processes,
+                                    first_trial=done)
+            jobs += [(c, configs[c], seed, trials) for trials in chunks]
+        # map_chunks returns chunks in job order, so each candidate's
+        # values stay in trial order for the paired differences
+        for c, results in map_chunks(_play, jobs,
+                                     max(1, min(processes, len(jobs)))):
+            for end_wallet, lifetime in results:
+                values[c].append(end_wallet if metric ==
+                                 END_WALLET else lifetime)
+                rolls[c] += lifetime
+
+        means = {c: sum(values[c]) / len(values[c]) for c in alive}
+        leader = max(alive, key=means.__getitem__)
+        for c in alive:
+            if c == leader:
+                continue
+            diff = mean_interval(
+                [x - y for x, y in zip(values[c], values[leader])],
+                confidence)
+            if diff.high < 0:
+                eliminated[c] = rounds
+        alive = [c for c in alive if c not in eliminated]
+        if halving and len(alive) > keep:
+            ranked = sorted(alive, key=means.__getitem__, reverse=True)
+            survivors = max(keep, math.ceil(len(alive) / eta))
+            for c in ranked[survivors:]:
+                eliminated[c] = rounds
+            alive = ranked[:survivors]
+        if len(alive) <= keep or target >= max_trials:
+            break
+        target = min(target * eta, max_trials)
+
+    def standing(c: int) -> Standing:
+        return Standing(_name(cells[c]), cells[c],
+                        mean_interval(values[c], confidence),
+                        len(values[c]), rolls[c], eliminated.get(c))
+
+    standings = [standing(c) for c in alive]
+    standings.sort(key=lambda s: s.interval.mean, reverse=True)
+    dropped = [standing(c) for c in eliminated]
+    dropped.sort(key=lambda s: (s.eliminated, s.interval.mean),
+                 reverse=True)
+    return TournamentResult(seed, metric, rounds, standings + dropped)
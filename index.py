@@ -1,15 +1,22 @@
 import csv
 import math
-import numpy  # type: ignore
 import logging
 from pprint import pprint
-from typing import List, Dict
+from typing import List, Dict, Sequence, Union
 from collections import defaultdict
 from craps.player import Player
 from craps.strategy import (PassBet, PassComeBet, ThreePointMolly, PlaceNumbers,  # noqa
                             ColorUp, FieldBetOnly, IronCross)
 from craps.game import Craps
-from craps.coin_control import coin_control
+from craps.runner import TrialConfig, summarize_trials
+from craps.stats import Histogram, Summary
+from craps.compare import compare
+from craps.sequential import Target, END_WALLET, RUIN, run_until
+from craps.cache import cached_run_trials
+from craps.sweep import grid, sweep
+from craps.tournament import tournament
+from craps.coin_control import coin_control_paths
+from craps.markov import solve
 from craps.constants import ROLL_ODDS, COME_OUT
 from craps.plot import plot
 
@@ -19,7 +26,7 @@ def run_strageies_and_save():
     WALLET = 1000
     ITERATIONS = 100
 
-    histories: List[List[int]] = []
+    histories: List[List[float]] = []
 
     strategies = [PassBet(), PassComeBet(), ThreePointMolly()]
 
@@ -29,7 +36,7 @@ def run_strageies_and_save():
         player = Player(name="Evan", wallet=WALLET, strategy=strat)
         game.join(player)
         game.start(max_iterations=ITERATIONS)
-        histories.append([h['wallet'] for h in game.game_history])
+        histories.append(list(game.game_history.wallet))
         for field_name, stats in game.field_win_lose.items():
             stats['percent'] = round(stats['win'] / stats['lose'] * 100.0, 2)
             print(field_name)
@@ -46,7 +53,9 @@ def run_strageies_and_save():
         print(f"Player lost: {ploss}")
         print(f"Player net: {pwin - ploss}")
 
-    plot(histories)
+    # One trial per strategy
+    plot([[h] for h in histories],
+         labels=[type(s).__name__ for s in strategies])
     # with open('out.csv', 'w') as csvfile:
     #     writer = csv.writer(csvfile)
     #     writer.writerow(["Trial Num", "Coin Control"] +
@@ -68,49 +77,48 @@ def dice_and_wallet():
     running_dice: List[str] = []
     last_phase = COME_OUT
     shooter_lengths: Dict[int, int] = defaultdict(int)
-    for hist in game.game_history:
-        running_dice.append(str(hist['dice']))
-        # phase = "COME OUT" if hist['phase'] else "POINT"
-        if hist['phase'] is not last_phase:
-            if hist['phase'] is COME_OUT and hist['dice'] == 7:
+    history = game.game_history
+    for roll, phase, wallet in zip(history.dice, history.phase,
+                                   history.wallet):
+        running_dice.append(str(roll))
+        # phase = "COME OUT" if phase else "POINT"
+        if bool(phase) is not last_phase:
+            if bool(phase) is COME_OUT and roll == 7:
                 dice = ' '.join(running_dice)
-                print(f"[{len(running_dice)}] {dice} [{int(hist['wallet'])}] ")
+                print(f"[{len(running_dice)}] {dice} [{int(wallet)}] ")
                 shooter_lengths[len(running_dice)] += 1
                 running_dice = []
-            last_phase = hist['phase']
-    print(len(game.game_history))
+            last_phase = bool(phase)
+    print(len(history))
     for i in range(1, max(shooter_lengths.keys())):
         print(f"{i+1}:\t{'*' * shooter_lengths.get(i+1, 0)}")
-    print(game.game_history[-1]['wallet']-WALLET)
+    print(history.wallet[-1]-WALLET)
 
 
-def _print_histogram(stats):
-    stats.sort()
+def _print_histogram(stats: Union[Sequence[float], Summary]):
     NUM_BINS = 10
-    min_w = int(min(stats))
-    max_w = int(max(stats))
-    buckets: Dict[int, int] = defaultdict(int)
-    for i in range(NUM_BINS):
-        buckets[i] = 0
-    bucket_size = (max_w - min_w) / NUM_BINS
-    for val in stats:
-        bin_num = math.floor((val - min_w) / bucket_size)
-        buckets[bin_num] += 1
+    if not isinstance(stats, Summary):
+        values = stats
+        # Every value is at hand, so the bins can be exact
+        stats = Summary(histogram=Histogram(min(values), max(values),
+                                            NUM_BINS))
+        stats.extend(values)
+    min_w = int(stats.stats.min)
+    max_w = int(stats.stats.max)
 
     print(f"Min: {min_w}")
-    print(f"P10: {int(round(numpy.percentile(stats, 10)))}")
-    print(f"P50: {int(round(numpy.percentile(stats, 50)))}")
-    print(f"P90: {int(round(numpy.percentile(stats, 90)))}")
+    print(f"P10: {int(round(stats.quantile(0.1)))}")
+    print(f"P50: {int(round(stats.quantile(0.5)))}")
+    print(f"P90: {int(round(stats.quantile(0.9)))}")
     print(f"Max: {max_w}")
     print(f"Range: {max_w-min_w}")
-    print(f"Variance: {numpy.var(stats)}")
-    print(f"Stdev: {numpy.std(stats)}")
-    bin_nums = list(buckets.keys())
-    bin_nums.sort()
-    for bin_num in bin_nums:
-        num = buckets[bin_num]
-        f = int(bin_num * bucket_size + min_w)
-        t = int((bin_num + 1) * bucket_size + min_w)
+    print(f"Variance: {stats.stats.population_variance}")
+    print(f"Stdev: {math.sqrt(stats.stats.population_variance)}")
+    histogram = stats.histogram(NUM_BINS)
+    edges = histogram.edges()
+    for bin_num, num in enumerate(histogram.counts):
+        f = int(edges[bin_num])
+        t = int(edges[bin_num + 1])
         s = round(num / len(stats) * 30) * "*"
         print(f"{s}\t\t{f}->{t}: {num}")
 
@@ -121,14 +129,9 @@ def histogram_of_endings():
     ITERATIONS = 100
 
     NUM_TRIALS = 1000
-    end_wallets: List[int] = []
-    for trial in range(NUM_TRIALS):
-        game = Craps(MIN_BET)
-        player = Player(name="Evan", wallet=WALLET, strategy=ThreePointMolly())
-        game.join(player)
-        game.start(max_iterations=ITERATIONS)
-        end_wallets.append(game.total_player_money())
-    _print_histogram(end_wallets)
+    config = TrialConfig(ThreePointMolly, MIN_BET, WALLET, ITERATIONS)
+    summary = summarize_trials(config, NUM_TRIALS)
+    _print_histogram(summary.end_wallets)
 
 
 def how_long_to_live():
@@ -136,14 +139,37 @@ def how_long_to_live():
     WALLET = 1000
 
     NUM_TRIALS = 100
-    num_rolls: List[int] = []
-    for trial in range(NUM_TRIALS):
-        game = Craps(MIN_BET)
-        player = Player(name="Evan", wallet=WALLET, strategy=ThreePointMolly())
-        game.join(player)
-        game.start(max_iterations=None)
-        num_rolls.append(game.iteration)
-    _print_histogram(num_rolls)
+    config = TrialConfig(ThreePointMolly, MIN_BET, WALLET, None)
+    summary = summarize_trials(config, NUM_TRIALS)
+    _print_histogram(summary.lifetimes)
+
+
+def histogram_of_endings_to_precision():
+    MIN_BET = 10
+    WALLET = 2000
+    ITERATIONS = 100
+
+    config = TrialConfig(ThreePointMolly, MIN_BET, WALLET, ITERATIONS)
+    result = run_until(config, [Target(END_WALLET, 5),
+                                Target(RUIN, 0.005)],
+                       max_trials=100000,
+                       max_seconds=600)
+    print(f"Trials: {result.num_trials} in {result.num_batches} batches, "
+          f"converged: {result.converged}")
+    for metric, interval in result.intervals.items():
+        print(f"{metric}: {interval}")
+    _print_histogram(result.summary.end_wallets)
+
+
+def how_long_to_live_exact():
+    MIN_BET = 10
+    WALLET = 1000
+
+    solution = solve(ThreePointMolly(), MIN_BET, WALLET, horizon=1000)
+    print(f"States: {solution.num_states}")
+    print(f"Expected rolls: {solution.expected_lifetime}")
+    print(f"Ruin before doubling: {solution.ruin_probability}")
+    print(f"Broke within 1000 rolls: {sum(solution.lifetime_pmf)}")
 
 
 def how_long_to_live_control():
@@ -151,12 +177,12 @@ def how_long_to_live_control():
     WALLET = 1000
 
     NUM_TRIALS = 10
-    result_histories: List[List[int]] = []
-    num_flips: List[int] = []
-    for trial in range(NUM_TRIALS):
-        results = coin_control(WALLET, None, MIN_BET, bias=0.9)
-        result_histories.append(results)
-        num_flips.append(len(results))
+    result_histories = coin_control_paths(WALLET,
+                                          None,
+                                          MIN_BET,
+                                          bias=0.9,
+                                          num_trials=NUM_TRIALS)
+    num_flips = [len(results) for results in result_histories]
     _print_histogram(num_flips)
 
     with open('out_how_long_to_live_control.csv', 'w') as csvfile:
@@ -175,6 +201,64 @@ def how_long_to_live_control():
             writer.writerow(row)
 
 
+def compare_strategies():
+    MIN_BET = 10
+    WALLET = 1000
+    ITERATIONS = 1000
+
+    NUM_TRIALS = 200
+    config = TrialConfig(PassBet, MIN_BET, WALLET, ITERATIONS)
+    comparison = compare([PassBet, PassComeBet, ThreePointMolly, IronCross],
+                         NUM_TRIALS,
+                         config,
+                         antithetic=True)
+    for name, mean, diff in comparison.summary():
+        print(f"{name}: {mean} | vs {comparison.names[0]}: {diff}")
+
+
+def sweep_odds_and_come_bets():
+    MIN_BET = 10
+    WALLET = 1000
+    ITERATIONS = 1000
+
+    NUM_TRIALS = 200
+    cells = grid(strategy=[PassComeBet, ThreePointMolly],
+                 min_bet=[5, MIN_BET],
+                 max_come_bets=[1, 2, 3],
+                 max_odds=[None, 10])
+    table = sweep(cells,
+                  NUM_TRIALS,
+                  base=TrialConfig(PassBet, MIN_BET, WALLET, ITERATIONS),
+                  checkpoint='sweep_checkpoint.jsonl',
+                  progress=lambda done, total: print(f"{done}/{total}"))
+    table.write_csv('out_sweep.csv')
+
+
+def race_strategy_variants():
+    MIN_BET = 10
+    WALLET = 1000
+    ITERATIONS = 1000
+
+    MAX_TRIALS = 3200
+    cells = grid(strategy=[ThreePointMolly],
+                 max_come_bets=[0, 1, 2, 3],
+                 max_odds=[None, 2, 5, 10]) + [
+                     dict(strategy=PlaceNumbers),
+                     dict(strategy=ColorUp),
+                     dict(strategy=IronCross)
+                 ]
+    result = tournament(cells,
+                        TrialConfig(PassBet, MIN_BET, WALLET, ITERATIONS),
+                        max_trials=MAX_TRIALS)
+    for standing in result.standings:
+        out = ("survived" if standing.eliminated is None else
+               f"out in round {standing.eliminated}")
+        print(f"{standing.name}: {standing.interval} | "
+              f"{standing.trials} trials, {standing.rolls} rolls, {out}")
+    full = len(cells) * MAX_TRIALS * (ITERATIONS + 1)
+    print(f"Rolls: {result.rolls} of {full} for full evaluations")
+
+
 def basic_debug_run():
     MIN_BET = 10
     WALLET = 1000
@@ -191,17 +275,18 @@ def plot_strategies(strategies):
     WALLET = 1000
     NUM_TRIALS = 10
     ITERATIONS = 1000
-    histories: List[List[List[int]]] = []
+    # Fixed so reruns are read back from the result cache
+    SEED = 2020
+    histories: List[List[List[float]]] = []
     for strategy in strategies:
-        trials: List[List[int]] = []
-        for trial in range(NUM_TRIALS):
-            game = Craps(MIN_BET)
-            player = Player(name="Evan", wallet=WALLET, strategy=strategy)
-            game.join(player)
-            game.start(max_iterations=ITERATIONS)
-            trials.append([h['wallet'] for h in game.game_history])
-        histories.append(trials)
-    plot(histories)
+        config = TrialConfig(strategy,
+                             MIN_BET,
+                             WALLET,
+                             ITERATIONS,
+                             trajectories=True)
+        histories.append(
+            cached_run_trials(config, NUM_TRIALS, SEED).trajectories)
+    plot(histories, labels=[s.__name__ for s in strategies])
 
 
 # https://en.wikipedia.org/wiki/Glossary_of_craps_terms
@@ -209,7 +294,12 @@ if __name__ == "__main__":
     # dice_and_wallet()
     # run_strageies_and_save()
     # histogram_of_endings()
+    # histogram_of_endings_to_precision()
     # how_long_to_live()
+    # how_long_to_live_exact()
     # how_long_to_live_control()
+    # compare_strategies()
+    # sweep_odds_and_come_bets()
+    # race_strategy_variants()
     # basic_debug_run()
-    plot_strategies(strategies=[IronCross()])
+    plot_strategies(strategies=[IronCross])